@@ -6,7 +6,6 @@ from flask_bcrypt import Bcrypt
 from flask_marshmallow import Marshmallow
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from sqlalchemy.sql import text
 import logging
 import os
 
@@ -17,8 +16,6 @@ bcrypt = Bcrypt()
 ma = Marshmallow()
 jwt_manager = JWTManager()
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 def create_app():
@@ -28,6 +25,14 @@ def create_app():
     from .config import Config
     app.config.from_object(Config)
 
+    # Structured logs through a queue, so request threads never wait on stderr
+    from .log import configure_logging
+    configure_logging(app)
+
+    # orjson-backed JSON with ISO 8601 datetimes (stdlib json when orjson is missing)
+    from .serializers import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     # Initialize extensions with the app
     db.init_app(app)
     migrate.init_app(app, db)
@@ -42,49 +47,54 @@ def create_app():
             "http://localhost:5173",  # For local development (adjust port if needed)
         ],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],  # Explicitly allow methods
-        "allow_headers": ["Content-Type", "Authorization"],  # Allow JWT and content type headers
+        "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "X-Request-ID"],  # Allow JWT, content type, revalidation and correlation headers
+        "expose_headers": ["X-Next-Cursor", "Link", "ETag", "X-Request-ID", "Server-Timing"],  # Let the frontend read pagination cursors, ETags, request ids and timings
         "supports_credentials": True  # If you need cookies or auth credentials
     }
     CORS(app, resources={r"/api/*": cors_options})
 
-    # Enable foreign keys for SQLite (optional, not needed for PostgreSQL on Render)
-    @app.before_request
-    def enable_foreign_keys():
-        if 'sqlite' in app.config['SQLALCHEMY_DATABASE_URI']:
-            db.session.execute(text('PRAGMA foreign_keys = ON'))
+    # SQLite PRAGMAs (foreign keys, plus WAL and friends in the sqlite-performance profile) run once per connection
+    from .sqlite import register_sqlite_pragmas, sqlite_pragmas
+    with app.app_context():
+        register_sqlite_pragmas(db.engine, sqlite_pragmas(app.config))
+
+    # Per-request SQL counts and timings, reported in Server-Timing and the slow-request log
+    from .timing import init_request_timing
+    with app.app_context():
+        init_request_timing(app)
 
     # Error handler for debugging
     @app.errorhandler(Exception)
     def handle_exception(e):
-        logger.error(f"Unhandled exception: {str(e)}")
+        logger.error("Unhandled exception: %s", e, exc_info=e)
         return {"error": "Internal server error"}, 500
 
-    # Import models and routes within the app context
+    # Liveness probe: answers without touching the database or loading the API modules
+    @app.route('/health')
+    def health_check():
+        return {"status": "healthy"}, 200
+
+    # Routes pull in the models, schemas and serializers; import them only when an app is built
     with app.app_context():
-        from .models import User, Teacher, Student, SchoolClass, Subject, Exam, Result, WelfareReport, Form, TeacherSubject
         from .routes import api_bp
 
         # Register the blueprint
         app.register_blueprint(api_bp, url_prefix='/api')
 
-        # Create database tables
-        try:
-            db.create_all()
-            logger.debug("Database tables created successfully")
-        except Exception as e:
-            logger.error(f"Error creating database tables: {str(e)}")
+        # Register maintenance commands
+        from .hashing import tune_bcrypt_command
+        from .stats import rebuild_exam_stats_command
+        app.cli.add_command(rebuild_exam_stats_command)
+        app.cli.add_command(tune_bcrypt_command)
 
-    # Log startup
-    logger.info(f"Flask app started with environment: {os.getenv('FLASK_ENV', 'production')}")
-
-    return app
+        # Generate the flat dump functions for the hot schemas before the first request
+        from .schemas import UserSchema, StudentSchema, ResultSchema, SubjectSchema, ExamSchema, WelfareReportSchema
+        from .serializers import precompile_serializers
+        precompile_serializers(UserSchema, StudentSchema, ResultSchema, SubjectSchema, ExamSchema, WelfareReportSchema)
 
-# Optional: Add a simple health check route outside the blueprint
-app = create_app()
+    # The schema is owned by the migrations (flask db upgrade); building an app never touches the database
 
-@app.route('/health')
-def health_check():
-    return {"status": "healthy"}, 200
+    # Log startup
+    logger.info("Flask app started with environment: %s", os.getenv('FLASK_ENV', 'production'))
 
-if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)))
\ No newline at end of file
+    return app
@@ -0,0 +1,155 @@
+# app/auth.py
+from collections import namedtuple
+from flask import g, current_app
+from flask_jwt_extended import get_jwt, get_jwt_identity, create_access_token, create_refresh_token
+from sqlalchemy import and_
+from app import db, jwt_manager
+from app.models import User, Teacher, SchoolClass
+import threading
+import time
+
+# Session-independent snapshot of the authenticated user and their scope
+Principal = namedtuple('Principal', ['id', 'username', 'email', 'role', 'teacher_id', 'class_ids', 'token_version'])
+
+# In-process caches: user_id -> (expires_at, Principal) and user_id -> (expires_at, token_version or None)
+_principal_cache = {}
+_token_version_cache = {}
+_principal_cache_lock = threading.Lock()
+
+def _query_principal(user_id):
+    """Load the user, their Teacher row and managed class ids in a single statement."""
+    rows = (
+        db.session.query(User.id, User.username, User.email, User.role, User.token_version, Teacher.id, SchoolClass.id)
+        .outerjoin(Teacher, and_(Teacher.user_id == User.id, Teacher.deleted_at.is_(None)))
+        .outerjoin(SchoolClass, and_(SchoolClass.class_teacher_id == User.id, SchoolClass.deleted_at.is_(None)))
+        .filter(User.id == user_id)
+        .all()
+    )
+    if not rows:
+        return None
+    uid, username, email, role, token_version = rows[0][:5]
+    teacher_ids = sorted({row[5] for row in rows if row[5] is not None})
+    class_ids = tuple(sorted({row[6] for row in rows if row[6] is not None}))
+    return Principal(uid, username, email, role, teacher_ids[0] if teacher_ids else None, class_ids, token_version or 0)
+
+def load_principal(user_id):
+    """Return the Principal for a user id, served from the short-TTL cache when possible."""
+    if user_id is None:
+        return None
+    user_id = int(user_id)
+    ttl = current_app.config.get('PRINCIPAL_CACHE_TTL', 0)
+    now = time.monotonic()
+    with _principal_cache_lock:
+        entry = _principal_cache.get(user_id)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    principal = _query_principal(user_id)
+    if principal is not None and ttl > 0:
+        with _principal_cache_lock:
+            _principal_cache[user_id] = (now + ttl, principal)
+    return principal
+
+def invalidate_principal(*user_ids):
+    """Drop cached principals after a write that changes a user's profile, role or class scope."""
+    with _principal_cache_lock:
+        for user_id in user_ids:
+            if user_id is not None:
+                _principal_cache.pop(int(user_id), None)
+                _token_version_cache.pop(int(user_id), None)
+
+def bump_token_version(*user_ids):
+    """Increment token_version so tokens carrying the old role/scope claims are rejected.
+
+    Runs inside the caller's transaction; call invalidate_principal() after committing.
+    """
+    user_ids = {int(user_id) for user_id in user_ids if user_id is not None}
+    if user_ids:
+        User.query.filter(User.id.in_(user_ids)).update(
+            {User.token_version: User.token_version + 1}, synchronize_session=False
+        )
+
+def principal_from_claims(claims):
+    """Rebuild a Principal from the role/scope claims embedded by issue_tokens()."""
+    return Principal(
+        int(claims['sub']), claims.get('username'), claims.get('email'), claims['role'],
+        claims.get('teacher_id'), tuple(claims.get('class_ids', ())), claims['ver']
+    )
+
+def current_principal():
+    """Return the authenticated user's Principal, loaded at most once per request."""
+    if 'principal' not in g:
+        claims = get_jwt()
+        if current_app.config.get('JWT_EMBED_CLAIMS') and 'role' in claims:
+            g.principal = principal_from_claims(claims)
+        else:
+            g.principal = load_principal(get_jwt_identity())
+    return g.principal
+
+def issue_tokens(user_id):
+    """Create the login/refresh token payload, embedding role and scope claims when enabled.
+
+    Claims are read from the database, not the per-worker cache, so a refresh
+    right after a role or class change picks up the new scope and version.
+    """
+    if not current_app.config.get('JWT_EMBED_CLAIMS'):
+        return {"token": create_access_token(identity=user_id)}
+
+    principal = _query_principal(int(user_id))
+    claims = {
+        "username": principal.username,
+        "email": principal.email,
+        "role": principal.role,
+        "teacher_id": principal.teacher_id,
+        "class_ids": list(principal.class_ids),
+        "ver": principal.token_version,
+    }
+    return {
+        "token": create_access_token(
+            identity=principal.id, additional_claims=claims,
+            expires_delta=current_app.config['JWT_CLAIMS_ACCESS_EXPIRES']
+        ),
+        # No version claim: a role or scope change must not log the user out, only make them refresh
+        "refresh_token": create_refresh_token(identity=principal.id),
+    }
+
+def _token_version(user_id):
+    """The live user's current token_version (a primary-key lookup), or None if deleted or missing."""
+    return (
+        db.session.query(User.token_version)
+        .filter(User.id == int(user_id), User.deleted_at.is_(None))
+        .scalar()
+    )
+
+def _cached_token_version(user_id):
+    """_token_version() served from the per-worker cache for PRINCIPAL_CACHE_TTL seconds."""
+    user_id = int(user_id)
+    ttl = current_app.config.get('PRINCIPAL_CACHE_TTL', 0)
+    now = time.monotonic()
+    with _principal_cache_lock:
+        entry = _token_version_cache.get(user_id)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    version = _token_version(user_id)
+    if ttl > 0:
+        with _principal_cache_lock:
+            _token_version_cache[user_id] = (now + ttl, version)
+    return version
+
+@jwt_manager.token_in_blocklist_loader
+def is_token_stale(jwt_header, jwt_payload):
+    """Reject claim-bearing access tokens issued before the user's last role or scope change,
+    and refresh tokens of deleted users.
+
+    Access tokens are checked against the per-worker token_version cache, so
+    authorization needs no query on a hit; a change made through another
+    worker revokes them within PRINCIPAL_CACHE_TTL seconds (and they expire
+    after JWT_CLAIMS_ACCESS_MINUTES regardless). Refresh tokens, used once
+    per access token lifetime, are checked against the database.
+    """
+    if jwt_payload.get('type') == 'refresh':
+        return _token_version(jwt_payload['sub']) is None
+    if 'ver' not in jwt_payload:
+        return False
+    return _cached_token_version(jwt_payload['sub']) != jwt_payload['ver']
@@ -0,0 +1,339 @@
+# app/cache.py
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, has_app_context, make_response, request
+from app.auth import current_principal
+from app.fieldsets import requested_tables
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
+
+# Response headers worth replaying from a cached entry
+_REPLAYED_HEADERS = ('X-Next-Cursor', 'Link')
+
+# Marks a base64-encoded bytes value (a response body) in a stored entry
+_BYTES = '__bytes__'
+
+def _encode_bytes(value):
+    if isinstance(value, bytes):
+        return {_BYTES: base64.b64encode(value).decode('ascii')}
+    raise TypeError(f"Cannot cache a value of type {type(value).__name__}")
+
+def _revive(value):
+    if isinstance(value, dict):
+        if len(value) == 1 and _BYTES in value:
+            return base64.b64decode(value[_BYTES])
+        return {key: _revive(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_revive(item) for item in value]
+    return value
+
+def _dump_entry(value):
+    """Serialize a cache value for a shared backend as JSON (bytes as base64), so loading an entry never runs code."""
+    if orjson is None:
+        return json.dumps(value, default=_encode_bytes).encode('utf-8')
+    return orjson.dumps(value, default=_encode_bytes)
+
+def _load_entry(data):
+    """Inverse of _dump_entry (tuples come back as lists); None for an entry that is not valid JSON."""
+    try:
+        return _revive(orjson.loads(data) if orjson is not None else json.loads(data))
+    except ValueError:
+        return None  # e.g. written by an older release that pickled entries
+
+class CacheStats:
+    """Hit/miss/eviction counters for one backend instance (per worker process)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "invalidations": 0}
+
+    def add(self, name, count=1):
+        with self._lock:
+            self.counts[name] += count
+
+class LRUBackend:
+    """In-process LRU bounded by entry count; invalidation only reaches this worker."""
+
+    name = 'lru'
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._tags = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+
+    def _drop(self, key):
+        expires_at, tags, value = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys:
+                keys.discard(key)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] < time.time():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.stats.add('misses')
+                return None
+            self._entries.move_to_end(key)
+        self.stats.add('hits')
+        return entry[2]
+
+    def set(self, key, value, ttl, tags):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.time() + ttl, tuple(tags), value)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                evicted += 1
+        self.stats.add('sets')
+        if evicted:
+            self.stats.add('evictions', evicted)
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            keys = set().union(*(self._tags.pop(tag, set()) for tag in tags))
+            for key in keys & self._entries.keys():
+                self._drop(key)
+        self.stats.add('invalidations', len(keys))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def size(self):
+        return len(self._entries)
+
+class SQLiteBackend:
+    """Cache shared by every worker on a host through one SQLite file (WAL mode)."""
+
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_tags (tag TEXT, key TEXT, PRIMARY KEY (tag, key))")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (expires_at)")
+
+    def _connection(self):
+        # sqlite3 connections must stay on the thread (and process) that opened them
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        value = _load_entry(row[0]) if row is not None else None
+        if value is None:
+            self.stats.add('misses')
+            return None
+        self.stats.add('hits')
+        return value
+
+    def set(self, key, value, ttl, tags):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, _dump_entry(value), time.time() + ttl)
+            )
+            conn.executemany("INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)", [(tag, key) for tag in tags])
+            overflow = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                # Expired entries go first, then those closest to expiry
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_entries ORDER BY expires_at LIMIT ?)",
+                    (overflow,)
+                )
+                conn.execute("DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)")
+        self.stats.add('sets')
+        if overflow > 0:
+            self.stats.add('evictions', overflow)
+
+    def invalidate_tags(self, tags):
+        placeholders = ','.join('?' * len(tags))
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            removed = conn.execute(
+                f"DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_tags WHERE tag IN ({placeholders}))", tags
+            ).rowcount
+            conn.execute(f"DELETE FROM cache_tags WHERE tag IN ({placeholders})", tags)
+        self.stats.add('invalidations', removed)
+
+    def clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_entries")
+            conn.execute("DELETE FROM cache_tags")
+
+    def size(self):
+        return self._connection().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+class RedisBackend:
+    """Cache shared across hosts through Redis; memory limits are left to Redis' own eviction policy."""
+
+    name = 'redis'
+
+    def __init__(self, url, prefix='edutech:cache:'):
+        import redis  # optional: only needed when RESPONSE_CACHE=redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.stats = CacheStats()
+
+    def get(self, key):
+        data = self.client.get(self.prefix + key)
+        value = _load_entry(data) if data is not None else None
+        if value is None:
+            self.stats.add('misses')
+            return None
+        self.stats.add('hits')
+        return value
+
+    def set(self, key, value, ttl, tags):
+        pipe = self.client.pipeline()
+        pipe.setex(self.prefix + key, int(ttl), _dump_entry(value))
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            pipe.sadd(tag_key, key)
+            # A tag set lives as long as its longest-lived entry: set a TTL on a new set, only ever extend it (Redis 7+)
+            pipe.expire(tag_key, int(ttl), nx=True)
+            pipe.expire(tag_key, int(ttl), gt=True)
+        pipe.execute()
+        self.stats.add('sets')
+
+    def invalidate_tags(self, tags):
+        tag_keys = [f"{self.prefix}tag:{tag}" for tag in tags]
+        keys = self.client.sunion(tag_keys)
+        pipe = self.client.pipeline()
+        if keys:
+            pipe.delete(*(self.prefix + key.decode('utf-8') for key in keys))
+        pipe.delete(*tag_keys)
+        pipe.execute()
+        self.stats.add('invalidations', len(keys))
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+    def size(self):
+        return sum(1 for key in self.client.scan_iter(self.prefix + '*') if b':tag:' not in key)
+
+def _create_backend(app):
+    kind = app.config['RESPONSE_CACHE']
+    max_entries = app.config['RESPONSE_CACHE_MAX_ENTRIES']
+    if kind == 'lru':
+        return LRUBackend(max_entries)
+    if kind == 'sqlite':
+        path = app.config['RESPONSE_CACHE_URL'] or os.path.join(app.instance_path, 'response_cache.sqlite')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return SQLiteBackend(path, max_entries)
+    if kind == 'redis':
+        return RedisBackend(app.config['RESPONSE_CACHE_URL'])
+    return None
+
+_backend_lock = threading.Lock()
+
+def cache_backend():
+    """The app's cache backend, created on first use; None when RESPONSE_CACHE is off."""
+    app = current_app._get_current_object()
+    with _backend_lock:
+        if 'response_cache' not in app.extensions:
+            app.extensions['response_cache'] = _create_backend(app)
+        return app.extensions['response_cache']
+
+def get_or_set(key, tags, compute, ttl=None):
+    """Memoize compute() under key until ttl expires or one of tags is invalidated.
+
+    Values must be JSON-serializable (bytes allowed) for the shared backends.
+    """
+    backend = cache_backend()
+    if backend is None:
+        return compute()
+    value = backend.get(key)
+    if value is None:
+        value = compute()
+        if value is not None:
+            backend.set(key, value, ttl or current_app.config['RESPONSE_CACHE_TTL'], tags)
+    return value
+
+def invalidate_cache_tags(*tags):
+    """Drop every cached entry carrying one of tags."""
+    backend = cache_backend() if has_app_context() else None
+    if backend is not None and tags:
+        backend.invalidate_tags(list(tags))
+
+def cache_stats():
+    backend = cache_backend()
+    if backend is None:
+        return {"backend": None}
+    return {"backend": backend.name, "entries": backend.size(), **backend.stats.counts}
+
+def _cache_key(principal):
+    # Admins see unscoped data and share entries; everyone else is keyed by identity
+    scope = principal.role if principal.role == 'admin' else f"{principal.role}:{principal.id}"
+    key = [request.endpoint, request.path, sorted(request.args.items(multi=True)), request.accept_mimetypes.best, scope]
+    return hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()
+
+def cached(*tags, ttl=None, include=None):
+    """Cache a GET view's successful responses, keyed by route, arguments and the caller's scope.
+
+    Entries expire after ttl (RESPONSE_CACHE_TTL by default) or when a write
+    invalidates one of tags, or of the include tags of the ?include=
+    collections the response carries. Streamed responses are never cached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            backend = cache_backend()
+            principal = current_principal()
+            if backend is None or not principal:
+                return view(*args, **kwargs)
+            key = _cache_key(principal)
+            entry = backend.get(key)
+            if entry is not None:
+                status, mimetype, headers, body = entry
+                response = current_app.response_class(body, status=status, mimetype=mimetype)
+                response.headers.update(headers)
+                return response
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                headers = {name: response.headers[name] for name in _REPLAYED_HEADERS if name in response.headers}
+                backend.set(
+                    key, (response.status_code, response.mimetype, headers, response.get_data()),
+                    ttl or current_app.config['RESPONSE_CACHE_TTL'], requested_tables(tags, include)
+                )
+            return response
+        return wrapper
+    return decorator
@@ -1,13 +1,113 @@
 # app/config.py
 import os
+from datetime import timedelta
 from dotenv import load_dotenv
 
 # Load .env file for local development (optional on Render)
 load_dotenv()
 
+def engine_options(database_uri):
+    """Pool settings sized to the worker topology: each gunicorn worker gets its own pool.
+
+    The default pool holds one connection per request thread plus one per
+    background job thread. Overflow is whatever is left of DB_MAX_CONNECTIONS
+    once it is shared between WEB_CONCURRENCY workers.
+    """
+    if database_uri.startswith("sqlite") and (database_uri in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in database_uri):
+        return {}  # in-memory SQLite uses a single shared connection (StaticPool)
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    threads = max(1, int(os.getenv("WEB_THREADS", "1")))
+    per_worker = max(1, int(os.getenv("DB_MAX_CONNECTIONS", "100")) // workers)
+    pool_size = min(int(os.getenv("DB_POOL_SIZE", "0")) or threads + int(os.getenv("JOB_WORKERS", "2")), per_worker)
+    max_overflow = os.getenv("DB_MAX_OVERFLOW")
+    options = {
+        "pool_size": pool_size,
+        "max_overflow": int(max_overflow) if max_overflow is not None else per_worker - pool_size,
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        # Replace connections before server/proxy idle timeouts close them, and test each one on checkout
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+    }
+    from app.pool import MeteredQueuePool
+    options["poolclass"] = MeteredQueuePool
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    if database_uri.startswith("postgresql") and statement_timeout:
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
+
 class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     # Use DATABASE_URL from environment, with fallback to SQLite for local dev
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///edutech.db").replace("postgres://", "postgresql://")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # SQLite connection PRAGMAs: default (foreign keys only) or sqlite-performance (WAL, NORMAL sync, mmap, cache, busy timeout)
+    SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default")
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
     SECRET_KEY = os.getenv("SECRET_KEY", "default_secret_key")
-    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt_secret_key")
\ No newline at end of file
+    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt_secret_key")
+    # bcrypt work factor for new hashes (older hashes are upgraded at login), concurrent hashes per worker process
+    # (only reached with threaded workers) and how long a request waits for a slot before getting a 503
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+    BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
+    BCRYPT_WAIT_MS = int(os.getenv("BCRYPT_WAIT_MS", "1000"))
+    # Seconds a loaded principal (user, teacher row, managed classes) is cached per worker; 0 disables
+    PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+
+    # Opt-in: embed role/teacher/class claims in access tokens; their token_version is cached like principals, so a
+    # role or scope change through another worker revokes them within PRINCIPAL_CACHE_TTL seconds
+    JWT_EMBED_CLAIMS = os.getenv("JWT_EMBED_CLAIMS", "false").lower() in ("1", "true", "yes")
+    JWT_CLAIMS_ACCESS_EXPIRES = timedelta(minutes=int(os.getenv("JWT_CLAIMS_ACCESS_MINUTES", "5")))
+
+    # Keyset pagination (?limit=&after=); requests without ?limit= get the default page size, capped at the max.
+    # A default of 0 is an explicit opt-in to the legacy unbounded lists
+    PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", "500"))
+    PAGINATION_DEFAULT_LIMIT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", "100"))
+
+    # Rows fetched per server-side cursor batch for NDJSON streaming responses and exports
+    STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+
+    # Serve GET /api/teachers from a per-worker precomputed directory, rebuilt after teacher/class writes
+    TEACHER_DIRECTORY_CACHE = os.getenv("TEACHER_DIRECTORY_CACHE", "false").lower() in ("1", "true", "yes")
+
+    # Reference-data ETags: seconds a worker trusts its copy of table_versions, and max-age sent to clients
+    REFERENCE_VERSION_TTL = float(os.getenv("REFERENCE_VERSION_TTL", "5"))
+    REFERENCE_CACHE_MAX_AGE = int(os.getenv("REFERENCE_CACHE_MAX_AGE", "0"))
+
+    # Response cache for GET routes: none, lru (per worker), sqlite (shared file per host) or redis (shared)
+    RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "none").lower()
+    RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")  # sqlite file path or redis:// URL
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "60"))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+
+    # Exams whose computed rankings are kept per worker (least recently used evicted first); 0 disables
+    RANKING_CACHE_SIZE = int(os.getenv("RANKING_CACHE_SIZE", "32"))
+
+    # Background jobs (report cards, exports): threads per worker and where their files are written
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_OUTPUT_DIR = os.getenv("JOB_OUTPUT_DIR")  # defaults to <instance>/jobs
+
+    # Report cards render in a process pool; 0 renders inside the job thread
+    REPORT_CARD_PROCESSES = int(os.getenv("REPORT_CARD_PROCESSES", str(os.cpu_count() or 1)))
+    REPORT_CARD_CHUNK_SIZE = int(os.getenv("REPORT_CARD_CHUNK_SIZE", "100"))
+
+    # Bulk student import: rows accepted per upload and rows per multi-row INSERT
+    IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "10000"))
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+
+    # Logging: JSON lines in production, readable text in development; written by a background thread.
+    # LOG_DEBUG_SAMPLE_RATE keeps debug records for that fraction of requests (1 keeps all)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if os.getenv("FLASK_ENV") == "development" else "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text" if os.getenv("FLASK_ENV") == "development" else "json").lower()
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1"))
+
+    # Request timing: Server-Timing headers (SQL statements and time, serialization, handler) and a slow-request
+    # log with the slowest statements. Profiles go to PROFILE_DIR for requests sent with X-Profile: <PROFILE_TOKEN>
+    # and for a PROFILE_SAMPLE_RATE fraction of all requests
+    REQUEST_TIMING = os.getenv("REQUEST_TIMING", "true").lower() in ("1", "true", "yes")
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+    SLOW_REQUEST_STATEMENTS = int(os.getenv("SLOW_REQUEST_STATEMENTS", "5"))
+    PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_DIR = os.getenv("PROFILE_DIR")  # defaults to <instance>/profiles
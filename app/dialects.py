@@ -0,0 +1,10 @@
+# app/dialects.py
+from app import db
+
+def upsert(model):
+    """INSERT for the session's database that supports on_conflict_do_update (SQLite and PostgreSQL)."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
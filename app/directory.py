@@ -0,0 +1,70 @@
+# app/directory.py
+from sqlalchemy.orm import joinedload
+from app.models import User, Teacher, SchoolClass
+from app.pagination import encode_cursor
+from app.versions import table_versions
+import threading
+
+# Precomputed teacher directory (full list) as (table versions it was built at, rows). It is rebuilt
+# when any of these tables' shared change counters move, so writes handled by another worker are
+# picked up within REFERENCE_VERSION_TTL
+_DIRECTORY_TABLES = ('teachers', 'users', 'school_classes', 'subjects')
+_teacher_directory = None
+_teacher_directory_lock = threading.Lock()
+
+def teacher_query():
+    """Live teacher users with their Teacher row and subjects eagerly loaded."""
+    return User.query.filter_by(role='teacher', deleted_at=None).options(joinedload(User.teacher).joinedload(Teacher.subjects))
+
+def managed_class_map(teacher_user_ids):
+    """Map class_teacher_id -> first live class they manage, fetched in a single query."""
+    managed = {}
+    if not teacher_user_ids:
+        return managed
+    classes = (
+        SchoolClass.query
+        .filter(SchoolClass.class_teacher_id.in_(teacher_user_ids), SchoolClass.deleted_at.is_(None))
+        .order_by(SchoolClass.id)
+    )
+    for cls in classes:
+        managed.setdefault(cls.class_teacher_id, cls)
+    return managed
+
+def teacher_directory_rows(teachers):
+    """Serialize teacher users with their subjects and managed class."""
+    managed = managed_class_map([teacher.id for teacher in teachers])
+    return [
+        {
+            "id": teacher.id,
+            "username": teacher.username,
+            "email": teacher.email,
+            "subjects": [subject.name for subject in teacher.teacher.subjects if subject.deleted_at is None] if teacher.teacher else [],
+            "managed_class": {"id": cls.id, "name": cls.name} if (cls := managed.get(teacher.id)) else None
+        }
+        for teacher in teachers
+    ]
+
+def cached_teacher_directory():
+    """Return the full precomputed directory, rebuilding it after an invalidation or a version change."""
+    global _teacher_directory
+    versions = table_versions(_DIRECTORY_TABLES)
+    with _teacher_directory_lock:
+        if _teacher_directory is None or _teacher_directory[0] != versions:
+            _teacher_directory = (versions, teacher_directory_rows(teacher_query().order_by(User.id).all()))
+        return _teacher_directory[1]
+
+def teacher_directory_page(limit, after):
+    """A keyset page of the precomputed directory: (rows, next_cursor), like paginate()."""
+    rows = cached_teacher_directory()
+    if after is not None:
+        rows = [row for row in rows if row["id"] > after]
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]["id"])
+
+def invalidate_teacher_directory():
+    """Discard this worker's precomputed directory right after it handled a teacher or class write."""
+    global _teacher_directory
+    with _teacher_directory_lock:
+        _teacher_directory = None
@@ -0,0 +1,186 @@
+# app/exports.py
+from flask import Response, current_app, stream_with_context
+from sqlalchemy import func, select
+from app import db
+from app.jobs import job_output_path
+from app.models import Exam, Form, Result, SchoolClass, Student, Subject
+from app.rankings import exam_rankings
+import csv
+import io
+import tempfile
+
+EXPORT_FORMATS = ('csv', 'parquet')
+EXPORT_FILTERS = ('form_id', 'exam_id', 'school_class_id')
+
+# Output column -> (SQL expression, Arrow type name used for Parquet)
+RESULT_EXPORT_COLUMNS = (
+    ('result_id', Result.id, 'int64'),
+    ('student_id', Result.student_id, 'int64'),
+    ('admission_number', Student.admission_number, 'string'),
+    ('student_name', Student.name, 'string'),
+    ('school_class_id', Student.school_class_id, 'int64'),
+    ('class_name', SchoolClass.name, 'string'),
+    ('form_name', Form.name, 'string'),
+    ('exam_id', Result.exam_id, 'int64'),
+    ('exam_name', Exam.name, 'string'),
+    ('term', Exam.term, 'string'),
+    ('subject_id', Result.subject_id, 'int64'),
+    ('subject_name', Subject.name, 'string'),
+    ('score', Result.score, 'float64'),
+    ('teacher_id', Result.teacher_id, 'int64'),
+    ('created_at', Result.created_at, 'timestamp'),
+)
+
+class ExportError(ValueError):
+    """Raised for invalid export parameters; rendered as a 400."""
+
+def export_filters(values):
+    """Validate form_id/exam_id/school_class_id/term from a query string or JSON body."""
+    filters = {}
+    for key in EXPORT_FILTERS:
+        if values.get(key) not in (None, ''):
+            try:
+                filters[key] = int(values[key])
+            except (TypeError, ValueError):
+                raise ExportError(f"Invalid {key}: {values[key]}")
+    if values.get('term'):
+        filters['term'] = str(values['term'])
+    return filters
+
+def results_export_statement(filters):
+    """Flat Core select of live results with their student, class, form, exam and subject labels."""
+    stmt = (
+        select(*(column.label(name) for name, column, _ in RESULT_EXPORT_COLUMNS))
+        .select_from(Result)
+        .join(Student, Student.id == Result.student_id)
+        .join(Exam, Exam.id == Result.exam_id)
+        .join(Form, Form.id == Exam.form_id)
+        .outerjoin(SchoolClass, SchoolClass.id == Student.school_class_id)
+        .outerjoin(Subject, Subject.id == Result.subject_id)
+        .where(Result.deleted_at.is_(None))
+    )
+    if 'form_id' in filters:
+        stmt = stmt.where(Exam.form_id == filters['form_id'])
+    if 'exam_id' in filters:
+        stmt = stmt.where(Result.exam_id == filters['exam_id'])
+    if 'school_class_id' in filters:
+        stmt = stmt.where(Student.school_class_id == filters['school_class_id'])
+    if 'term' in filters:
+        stmt = stmt.where(func.lower(Exam.term) == filters['term'].strip().lower())
+    return stmt.order_by(Result.id)
+
+def _partitions(stmt):
+    """Row batches from a server-side cursor; no ORM entities are built."""
+    batch_size = current_app.config['STREAM_BATCH_SIZE']
+    return db.session.execute(stmt, execution_options={'yield_per': batch_size}).partitions()
+
+def csv_chunks(stmt, on_batch=None):
+    """CSV text for a statement: the header, then one chunk per cursor batch."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow([name for name, _, _ in RESULT_EXPORT_COLUMNS])
+    yield out.getvalue()
+    for partition in _partitions(stmt):
+        out.seek(0)
+        out.truncate()
+        writer.writerows(partition)
+        yield out.getvalue()
+        if on_batch:
+            on_batch(len(partition))
+
+def require_parquet():
+    """Import pyarrow lazily; Parquet output is optional."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportError("Parquet export requires the pyarrow package; use format=csv instead")
+    return pyarrow
+
+def write_parquet(stmt, sink, on_batch=None):
+    """Write a statement to a binary file object as Parquet, one row group per cursor batch."""
+    pa = require_parquet()
+    types = {'int64': pa.int64(), 'float64': pa.float64(), 'string': pa.string(), 'timestamp': pa.timestamp('us')}
+    schema = pa.schema([(name, types[kind]) for name, _, kind in RESULT_EXPORT_COLUMNS])
+    with pa.parquet.ParquetWriter(sink, schema) as writer:
+        for partition in _partitions(stmt):
+            columns = list(zip(*partition))
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+            ))
+            if on_batch:
+                on_batch(len(partition))
+
+def results_export_response(filters, fmt):
+    """Stream an export straight to the client with memory bounded by STREAM_BATCH_SIZE."""
+    stmt = results_export_statement(filters)
+    headers = {'Content-Disposition': f'attachment; filename=results.{fmt}'}
+    if fmt == 'csv':
+        return Response(stream_with_context(csv_chunks(stmt)), mimetype='text/csv', headers=headers)
+
+    # Parquet writes its footer last, so spool to a temporary file and stream that back
+    require_parquet()
+    spool = tempfile.TemporaryFile()
+    write_parquet(stmt, spool)
+    spool.seek(0)
+
+    def generate():
+        with spool:
+            while chunk := spool.read(64 * 1024):
+                yield chunk
+
+    return Response(generate(), mimetype='application/vnd.apache.parquet', headers=headers)
+
+def export_results_job(progress, filters, fmt):
+    """Job body: write a results export to the job directory."""
+    stmt = results_export_statement(filters)
+    progress.start(db.session.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar())
+    path = job_output_path(progress.id, f"results.{fmt}")
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            for chunk in csv_chunks(stmt, on_batch=progress.advance):
+                f.write(chunk)
+    else:
+        with open(path, 'wb') as f:
+            write_parquet(stmt, f, on_batch=progress.advance)
+    return path
+
+def gradebook_chunks(exam, school_class_ids=None):
+    """Wide CSV for one exam: a row per student with a score column per subject, totals and positions."""
+    ranking = exam_rankings(exam.id)
+    order = ranking.form_positions.argsort(kind='stable').tolist()
+    if school_class_ids is not None:
+        order = [i for i in order if int(ranking.school_class_ids[i]) in school_class_ids]
+    subject_ids = sorted(set(ranking.subject_ids.tolist()))
+    subject_names = dict(db.session.query(Subject.id, Subject.name).filter(Subject.id.in_(subject_ids))) if subject_ids else {}
+    students = {
+        student_id: (admission_number, name)
+        for student_id, admission_number, name in db.session.query(Student.id, Student.admission_number, Student.name)
+        .filter(Student.id.in_([int(ranking.student_ids[i]) for i in order]))
+    } if order else {}
+
+    scores = {}
+    for row_student, subject_id, score in zip(ranking.row_students.tolist(), ranking.subject_ids.tolist(), ranking.scores.tolist()):
+        scores[(row_student, subject_id)] = score
+
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(
+        ['student_id', 'admission_number', 'student_name', 'school_class_id']
+        + [subject_names.get(subject_id, f"subject_{subject_id}") for subject_id in subject_ids]
+        + ['total', 'mean', 'class_position', 'form_position']
+    )
+    for i in order:
+        student_id = int(ranking.student_ids[i])
+        admission_number, name = students.get(student_id, ('', ''))
+        writer.writerow(
+            [student_id, admission_number, name, int(ranking.school_class_ids[i])]
+            + [scores.get((i, subject_id), '') for subject_id in subject_ids]
+            + [float(ranking.totals[i]), round(float(ranking.means[i]), 2),
+               int(ranking.class_positions[i]), int(ranking.form_positions[i])]
+        )
+        if out.tell() > 64 * 1024:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+    yield out.getvalue()
@@ -0,0 +1,77 @@
+# app/fieldsets.py
+from flask import request
+from marshmallow import fields
+from marshmallow_sqlalchemy.fields import Related, RelatedList
+from sqlalchemy import inspect
+from sqlalchemy.orm import selectinload
+
+class FieldsetError(ValueError):
+    """Raised for unknown names in ?fields= or ?include=; rendered as a 400."""
+
+# schema class -> (all dump field names, to-many nested field names)
+_schema_fields = {}
+
+def _is_collection(field):
+    return isinstance(field, RelatedList) or (isinstance(field, fields.Nested) and field.many)
+
+def schema_fields(schema_cls):
+    """Dump field names of a schema and the subset that are nested collections."""
+    if schema_cls not in _schema_fields:
+        dump_fields = schema_cls().dump_fields
+        _schema_fields[schema_cls] = (
+            frozenset(dump_fields),
+            frozenset(name for name, field in dump_fields.items() if _is_collection(field)),
+        )
+    return _schema_fields[schema_cls]
+
+def _names(arg):
+    raw = request.args.get(arg)
+    return {name.strip() for name in raw.split(',') if name.strip()} if raw else set()
+
+def sparse_schema(schema_cls, many=False):
+    """Instantiate a schema honouring ?fields= and ?include= from the query string.
+
+    ?fields= limits the top-level fields; nested collections (a subject's
+    results, an exam's results, a user's students...) are only dumped when
+    named in ?include= or ?fields=.
+    """
+    declared, collections = schema_fields(schema_cls)
+    only, include = _names('fields'), _names('include')
+    if only - declared:
+        raise FieldsetError(f"Unknown fields: {', '.join(sorted(only - declared))}")
+    if include - collections:
+        available = ', '.join(sorted(collections)) or 'none'
+        raise FieldsetError(f"Cannot include: {', '.join(sorted(include - collections))} (available: {available})")
+    include |= only & collections
+    return schema_cls(many=many, only=(only | include) if only else None, exclude=tuple(collections - include))
+
+def requested_tables(tables, include):
+    """tables plus those read by each nested collection this request dumps (see sparse_schema).
+
+    include maps collection field names to the tables behind them; names it
+    does not know are left for sparse_schema to reject.
+    """
+    if not include:
+        return tables
+    requested = (_names('include') | _names('fields')) & include.keys()
+    return tuple(dict.fromkeys(tables + tuple(table for name in sorted(requested) for table in include[name])))
+
+def loader_options(model, schema):
+    """selectinload options for every relationship a schema instance will dump, nested ones included."""
+    relationships = inspect(model).relationships
+    options = []
+    for name, field in schema.dump_fields.items():
+        attribute = field.attribute or name
+        if attribute not in relationships or not isinstance(field, (fields.Nested, Related, RelatedList)):
+            continue
+        option = selectinload(getattr(model, attribute))
+        if isinstance(field, fields.Nested):
+            nested = loader_options(relationships[attribute].mapper.class_, field.schema)
+            if nested:
+                option = option.options(*nested)
+        options.append(option)
+    return options
+
+def sparse_query(query, model, schema):
+    """Eager-load exactly what a sparse schema dumps, so the statement count is fixed per request."""
+    return query.options(*loader_options(model, schema))
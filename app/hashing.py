@@ -0,0 +1,92 @@
+# app/hashing.py
+from flask import current_app
+import bcrypt
+import click
+import re
+import threading
+import time
+
+class HashingBusy(RuntimeError):
+    """Raised when no hashing slot frees up within BCRYPT_WAIT_MS; rendered as a 503."""
+
+# bcrypt releases the GIL while hashing, so with threaded workers several
+# request threads can hash at once; BCRYPT_WORKERS slots cap that per worker
+# process. A request that cannot get a slot within BCRYPT_WAIT_MS is turned
+# away instead of queueing, so a login burst sheds load rather than piling up
+# threads behind the hashes. Sync workers serve one request at a time and
+# never wait here.
+_slots = None
+_slots_lock = threading.Lock()
+
+_COST_PATTERN = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+def _semaphore():
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(current_app.config['BCRYPT_WORKERS'])
+        return _slots
+
+def _run(fn, *args):
+    slots = _semaphore()
+    if not slots.acquire(timeout=current_app.config['BCRYPT_WAIT_MS'] / 1000):
+        raise HashingBusy("Too many password checks in progress; try again shortly")
+    try:
+        return fn(*args)
+    finally:
+        slots.release()
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _check(stored_hash, password):
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+    except ValueError:
+        return False  # Not a bcrypt hash (e.g. a legacy plaintext value)
+
+def hash_password(password):
+    """Hash a password at the configured work factor."""
+    return _run(_hash, password, current_app.config['BCRYPT_LOG_ROUNDS'])
+
+def check_password(stored_hash, password):
+    """True when password matches a stored bcrypt hash."""
+    if not stored_hash:
+        return False
+    return _run(_check, stored_hash, password)
+
+def hash_cost(stored_hash):
+    """Work factor recorded in a bcrypt hash, or None if it is not one."""
+    match = _COST_PATTERN.match(stored_hash or '')
+    return int(match.group(1)) if match else None
+
+def verify_and_upgrade(user, password):
+    """Check a user's password, re-hashing it at the configured cost if it was stored at another one.
+
+    The new hash is only assigned to user.password; the caller commits.
+    """
+    if not check_password(user.password, password):
+        return False
+    if hash_cost(user.password) != current_app.config['BCRYPT_LOG_ROUNDS']:
+        user.password = hash_password(password)
+    return True
+
+@click.command('tune-bcrypt')
+@click.option('--target-ms', type=float, default=250.0, show_default=True, help='Acceptable time for one hash.')
+@click.option('--min-rounds', type=int, default=10, show_default=True)
+@click.option('--max-rounds', type=int, default=15, show_default=True)
+def tune_bcrypt_command(target_ms, min_rounds, max_rounds):
+    """Time bcrypt on this host and suggest BCRYPT_LOG_ROUNDS for a target latency."""
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            _hash('benchmark-password', rounds)
+            timings.append((time.perf_counter() - start) * 1000)
+        elapsed = min(timings)
+        click.echo(f"rounds={rounds:2d}  {elapsed:8.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    click.echo(f"Suggested BCRYPT_LOG_ROUNDS={chosen} (target {target_ms:.0f} ms; currently {current_app.config['BCRYPT_LOG_ROUNDS']})")
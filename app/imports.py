@@ -0,0 +1,143 @@
+# app/imports.py
+from flask import current_app
+from sqlalchemy import func, insert, or_
+from app import db
+from app.models import User, Student, SchoolClass, Subject, student_subjects
+import csv
+import io
+
+STUDENT_IMPORT_COLUMNS = ('name', 'admission_number', 'parent_email')
+
+class ImportFileError(ValueError):
+    """Raised when an uploaded file cannot be read at all (as opposed to per-row errors)."""
+
+def _csv_rows(stream):
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for row in reader:
+        yield {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+
+def _xlsx_rows(stream):
+    try:
+        import openpyxl  # optional: only needed for spreadsheet uploads
+    except ImportError:
+        raise ImportFileError("XLSX import requires the openpyxl package; upload a CSV file instead")
+    sheet = openpyxl.load_workbook(stream, read_only=True, data_only=True).active
+    rows = sheet.iter_rows(values_only=True)
+    header = [str(cell or '').strip().lower() for cell in next(rows, ())]
+    for values in rows:
+        if not any(value is not None for value in values):
+            continue
+        yield {key: '' if value is None else str(value).strip() for key, value in zip(header, values)}
+
+def read_upload(upload):
+    """Iterate an uploaded CSV or XLSX file as dicts keyed by lower-cased header."""
+    filename = (upload.filename or '').lower()
+    if filename.endswith('.xlsx'):
+        return _xlsx_rows(upload.stream)
+    if filename.endswith('.csv') or upload.mimetype in ('text/csv', 'application/csv'):
+        return _csv_rows(upload.stream)
+    raise ImportFileError("Unsupported file type: upload a .csv or .xlsx file")
+
+def _split_subjects(value):
+    return [name.strip() for name in value.replace(';', ',').split(',') if name.strip()]
+
+def import_students(rows, dry_run=False):
+    """Validate and insert students (and their subject enrolments) from parsed rows.
+
+    Parents, classes, subjects and existing admission numbers are each resolved
+    with one query; valid rows are inserted with multi-row INSERTs in the
+    caller's transaction. Returns (created, errors); nothing is written when
+    dry_run is set.
+    """
+    max_rows = current_app.config['IMPORT_MAX_ROWS']
+    parsed = []
+    for line, row in enumerate(rows, start=2):  # line 1 is the header
+        if len(parsed) >= max_rows:
+            raise ImportFileError(f"Too many rows: at most {max_rows} students per import")
+        parsed.append((line, row))
+    if not parsed:
+        raise ImportFileError("The file has no data rows")
+    columns = set(parsed[0][1])
+    if not set(STUDENT_IMPORT_COLUMNS) <= columns or not columns & {'school_class_id', 'class_name'}:
+        raise ImportFileError(
+            f"Missing columns: {', '.join(STUDENT_IMPORT_COLUMNS)} and school_class_id or class_name are required"
+        )
+
+    emails = {row.get('parent_email', '').lower() for _, row in parsed} - {''}
+    class_ids = {int(row['school_class_id']) for _, row in parsed if row.get('school_class_id', '').isdigit()}
+    class_names = {row.get('class_name', '') for _, row in parsed} - {''}
+    subject_names = {name for _, row in parsed for name in _split_subjects(row.get('subjects', ''))}
+    admission_numbers = {row.get('admission_number', '') for _, row in parsed} - {''}
+
+    parents = dict(
+        db.session.query(func.lower(User.email), User.id)
+        .filter(func.lower(User.email).in_(emails), User.role == 'parent', User.deleted_at.is_(None))
+    ) if emails else {}
+    classes_by_id, classes_by_name = {}, {}
+    if class_ids or class_names:
+        for class_id, class_name in (
+            db.session.query(SchoolClass.id, SchoolClass.name)
+            .filter(or_(SchoolClass.id.in_(class_ids), SchoolClass.name.in_(class_names)), SchoolClass.deleted_at.is_(None))
+        ):
+            classes_by_id[class_id] = class_id
+            classes_by_name[class_name] = class_id
+    subjects = dict(
+        db.session.query(Subject.name, Subject.id).filter(Subject.name.in_(subject_names), Subject.deleted_at.is_(None))
+    ) if subject_names else {}
+    taken = {
+        number for number, in
+        db.session.query(Student.admission_number).filter(Student.admission_number.in_(admission_numbers))
+    } if admission_numbers else set()
+
+    valid, errors, seen = [], [], set()
+    for line, row in parsed:
+        admission_number = row.get('admission_number', '')
+
+        def reject(message):
+            errors.append({"row": line, "admission_number": admission_number or None, "message": message})
+
+        if not row.get('name') or not admission_number or not row.get('parent_email'):
+            reject("name, admission_number and parent_email are required")
+            continue
+        if admission_number in seen:
+            reject("Duplicate admission_number in file")
+            continue
+        seen.add(admission_number)
+        if admission_number in taken:
+            reject("Admission number already exists")
+            continue
+        parent_id = parents.get(row['parent_email'].lower())
+        if not parent_id:
+            reject("Parent email not found or not a parent role")
+            continue
+        raw_class_id = row.get('school_class_id', '')
+        school_class_id = classes_by_id.get(int(raw_class_id)) if raw_class_id.isdigit() else classes_by_name.get(row.get('class_name', ''))
+        if not school_class_id:
+            reject("School class not found")
+            continue
+        names = _split_subjects(row.get('subjects', ''))
+        unknown = [name for name in names if name not in subjects]
+        if unknown:
+            reject(f"Unknown subjects: {', '.join(unknown)}")
+            continue
+        valid.append(({
+            "name": row['name'], "admission_number": admission_number,
+            "school_class_id": school_class_id, "parent_id": parent_id, "deleted_at": None
+        }, {subjects[name] for name in names}))
+
+    if dry_run or not valid:
+        return len(valid), errors
+
+    batch_size = current_app.config['IMPORT_BATCH_SIZE']
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        created = dict(db.session.execute(
+            insert(Student).returning(Student.admission_number, Student.id), [student for student, _ in batch]
+        ).all())
+        enrolments = [
+            {"student_id": created[student["admission_number"]], "subject_id": subject_id}
+            for student, subject_ids in batch for subject_id in subject_ids
+        ]
+        if enrolments:
+            db.session.execute(insert(student_subjects), enrolments)
+    return len(valid), errors
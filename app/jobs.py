@@ -0,0 +1,108 @@
+# app/jobs.py
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+import json
+import os
+import threading
+import uuid
+
+# Background work (report cards, exports) runs on a small per-worker thread pool.
+# Job state is mirrored to <JOB_OUTPUT_DIR>/<id>.json so any worker can answer
+# status and download requests.
+_executor = None
+_executor_lock = threading.Lock()
+
+class JobError(Exception):
+    """Raised by job functions for an expected failure; its message is shown to the caller."""
+
+def job_dir():
+    path = current_app.config['JOB_OUTPUT_DIR'] or os.path.join(current_app.instance_path, 'jobs')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _state_path(job_id):
+    return os.path.join(job_dir(), f"{job_id}.json")
+
+def _write_state(state):
+    path = _state_path(state['id'])
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(path + '.tmp', path)  # Readers never see a half-written file
+
+def get_job(job_id):
+    """Current state of a job as a dict, or None for an unknown id."""
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        return None
+    try:
+        with open(_state_path(job_id)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def job_output_path(job_id, filename):
+    """Where a job should write its output file."""
+    return os.path.join(job_dir(), f"{job_id}-{filename}")
+
+class JobProgress:
+    """Handle passed to job functions for reporting progress."""
+
+    def __init__(self, state):
+        self.state = state
+
+    @property
+    def id(self):
+        return self.state['id']
+
+    def start(self, total):
+        self.state.update(status='running', total=total, completed=0)
+        _write_state(self.state)
+
+    def advance(self, count=1):
+        self.state['completed'] += count
+        _write_state(self.state)
+
+def _executor_for(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=app.config['JOB_WORKERS'], thread_name_prefix='job')
+        return _executor
+
+def _run(app, state, fn, args):
+    with app.app_context():
+        progress = JobProgress(state)
+        try:
+            path = fn(progress, *args)
+            state.update(status='done', path=path, finished_at=datetime.utcnow().isoformat())
+        except JobError as e:
+            state.update(status='failed', error=str(e), finished_at=datetime.utcnow().isoformat())
+        except Exception as e:
+            app.logger.exception("Job %s (%s) failed", state['id'], state['kind'])
+            state.update(status='failed', error=f"Internal error: {e}", finished_at=datetime.utcnow().isoformat())
+        _write_state(state)
+
+def submit_job(kind, owner_id, fn, *args):
+    """Queue fn(progress, *args) in the background; fn returns the path of the file it produced."""
+    app = current_app._get_current_object()
+    state = {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "owner_id": owner_id,
+        "status": "queued",
+        "total": None,
+        "completed": 0,
+        "path": None,
+        "error": None,
+        "created_at": datetime.utcnow().isoformat(),
+        "finished_at": None
+    }
+    _write_state(state)
+    _executor_for(app).submit(_run, app, state, fn, args)
+    return state
+
+def job_summary(state):
+    """Public view of a job (the output path stays server-side)."""
+    return {key: value for key, value in state.items() if key != 'path'}
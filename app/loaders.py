@@ -0,0 +1,27 @@
+# app/loaders.py
+from sqlalchemy.orm import joinedload, selectinload
+from app.models import Student, SchoolClass
+
+# Named eager-loading profiles: each list endpoint issues a fixed number of
+# statements regardless of how many rows it returns (checked by
+# benchmarks/loader_statements.py; keep its EXPECTED counts in step).
+LOADER_PROFILES = {
+    # students -> class (many-to-one) and subjects (many-to-many): 3 statements
+    'students.list': (
+        selectinload(Student.school_class),
+        selectinload(Student.subjects),
+    ),
+    # parent dashboard only shows the class name: 2 statements
+    'students.by_parent': (
+        selectinload(Student.school_class),
+    ),
+    # classes -> form and class teacher are both many-to-one: 1 statement
+    'classes.list': (
+        joinedload(SchoolClass.form),
+        joinedload(SchoolClass.class_teacher),
+    ),
+}
+
+def with_profile(query, name):
+    """Apply a named loader profile to a query."""
+    return query.options(*LOADER_PROFILES[name])
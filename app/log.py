@@ -0,0 +1,159 @@
+# app/log.py
+from flask import g, has_request_context, request
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
+
+LOG_FORMATS = ('json', 'text')
+
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+# Attributes every LogRecord has; anything else on a record came from extra= and is logged as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+# One listener per process: it owns the only handler that writes, on its own thread
+_handler = None
+_listener = None
+_log_format = None
+_lock = threading.Lock()
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and any extra= fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, 'request_id', '-') != '-':
+            entry["request_id"] = record.request_id
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRS and name not in entry:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        if orjson is None:
+            return json.dumps(entry, default=str)
+        return orjson.dumps(entry, default=str, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+class RequestContextFilter(logging.Filter):
+    """Tags records with the request's correlation id and drops debug records of unsampled requests.
+
+    Runs on the calling thread, where the request context is still available.
+    """
+
+    def __init__(self, debug_sample_rate):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id', '-')
+            sampled = g.get('log_sampled', True)
+        else:
+            record.request_id = '-'
+            sampled = self.debug_sample_rate >= 1 or random.random() < self.debug_sample_rate
+        return sampled or record.levelno > logging.DEBUG
+
+class _QueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() formats the message on the calling thread; only %-style
+    arguments need merging here (so they cannot change before they are written),
+    and tracebacks are rendered to text because they do not survive the queue.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def _formatter(log_format):
+    if log_format == 'json':
+        return JSONFormatter()
+    return logging.Formatter('%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s')
+
+def _start_listener():
+    global _listener
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(_formatter(_log_format))
+    _listener = QueueListener(_handler.queue, output)
+    _listener.start()
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _restart_in_child():
+    # The listener thread does not survive fork (gunicorn preload_app); give the child its own, on a fresh queue
+    global _listener
+    if _handler is not None:
+        _listener = None
+        _handler.queue = queue.SimpleQueue()
+        _start_listener()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_in_child)
+atexit.register(_stop_listener)
+
+def configure_logging(app):
+    """Route all logging through a queue to a background writer, in the configured format and level."""
+    global _handler, _log_format
+    log_format = app.config['LOG_FORMAT']
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown LOG_FORMAT: {log_format}. Must be one of {list(LOG_FORMATS)}")
+
+    with _lock:
+        root = logging.getLogger()
+        _stop_listener()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        _handler = _QueueHandler(queue.SimpleQueue())
+        _handler.addFilter(RequestContextFilter(app.config['LOG_DEBUG_SAMPLE_RATE']))
+        _log_format = log_format
+        _start_listener()
+        root.addHandler(_handler)
+        root.setLevel(app.config['LOG_LEVEL'])
+
+    # SQLAlchemy logs every statement at INFO once its loggers are enabled; keep them to warnings
+    logging.getLogger('sqlalchemy').setLevel(logging.WARN)
+
+    @app.before_request
+    def assign_request_id():
+        supplied = request.headers.get('X-Request-ID', '')
+        g.request_id = supplied if _REQUEST_ID.match(supplied) else uuid.uuid4().hex
+        rate = app.config['LOG_DEBUG_SAMPLE_RATE']
+        g.log_sampled = rate >= 1 or random.random() < rate
+
+    @app.after_request
+    def echo_request_id(response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
@@ -1,5 +1,6 @@
 from app import db
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from app.validation import register_foreign_key_checks
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, func
 from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 
@@ -36,6 +37,7 @@ class User(db.Model):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     deleted_at = Column(DateTime, nullable=True)
+    token_version = Column(Integer, nullable=False, default=0, server_default='0')  # Bumped to revoke role/scope claims in issued tokens
     
     teacher = relationship('Teacher', back_populates='user', uselist=False)
     students = relationship('Student', back_populates='parent')
@@ -63,12 +65,6 @@ class Teacher(db.Model):
     user = relationship('User', back_populates='teacher')
     results = relationship('Result', back_populates='teacher')  # Add this line
 
-    @validates('user_id')
-    def validate_user_id(self, key, user_id):
-        if not User.query.get(user_id):
-            raise ValueError(f"Invalid user_id: {user_id} - No matching user exists")
-        return user_id
-
 # Student Model
 class Student(db.Model):
     __tablename__ = 'students'
@@ -85,18 +81,6 @@ class Student(db.Model):
     results = relationship('Result', back_populates='student')
     welfare_reports = relationship('WelfareReport', back_populates='student')
 
-    @validates('school_class_id')
-    def validate_school_class_id(self, key, school_class_id):
-        if not SchoolClass.query.get(school_class_id):
-            raise ValueError(f"Invalid school_class_id: {school_class_id} - No matching class exists")
-        return school_class_id
-
-    @validates('parent_id')
-    def validate_parent_id(self, key, parent_id):
-        if not User.query.get(parent_id):
-            raise ValueError(f"Invalid parent_id: {parent_id} - No matching user exists")
-        return parent_id
-
 # Form Model
 class Form(db.Model):
     __tablename__ = 'forms'
@@ -120,18 +104,6 @@ class SchoolClass(db.Model):
     class_teacher = relationship('User', back_populates='managed_classes', foreign_keys='SchoolClass.class_teacher_id')
     students = relationship('Student', back_populates='school_class')
 
-    @validates('form_id')
-    def validate_form_id(self, key, form_id):
-        if not Form.query.get(form_id):
-            raise ValueError(f"Invalid form_id: {form_id} - No matching form exists")
-        return form_id
-
-    @validates('class_teacher_id')
-    def validate_class_teacher_id(self, key, class_teacher_id):
-        if class_teacher_id and not User.query.get(class_teacher_id):
-            raise ValueError(f"Invalid class_teacher_id: {class_teacher_id} - No matching user exists")
-        return class_teacher_id
-
 # Subject Model
 class Subject(db.Model):
     __tablename__ = 'subjects'
@@ -157,11 +129,8 @@ class Exam(db.Model):
     form = relationship('Form', back_populates='exams', foreign_keys=[form_id])
     results = relationship('Result', back_populates='exam')
 
-    @validates('form_id')
-    def validate_form_id(self, key, form_id):
-        if not Form.query.get(form_id):
-            raise ValueError(f"Invalid form_id: {form_id} - No matching form exists")
-        return form_id
+# Report cards, exports and student results look exams up by form and case-insensitive term
+db.Index('idx_exam_form_lower_term', Exam.form_id, func.lower(Exam.term))
 
 # In app/models.py
 class Result(db.Model):
@@ -180,29 +149,11 @@ class Result(db.Model):
     subject = relationship('Subject', back_populates='results')
     teacher = relationship('Teacher', back_populates='results')  # Optional relationship
 
-    @validates('student_id')
-    def validate_student_id(self, key, student_id):
-        if not Student.query.get(student_id):
-            raise ValueError(f"Invalid student_id: {student_id}")
-        return student_id
-
-    @validates('exam_id')
-    def validate_exam_id(self, key, exam_id):
-        if not Exam.query.get(exam_id):
-            raise ValueError(f"Invalid exam_id: {exam_id}")
-        return exam_id
-
-    @validates('subject_id')
-    def validate_subject_id(self, key, subject_id):
-        if not Subject.query.get(subject_id):
-            raise ValueError(f"Invalid subject_id: {subject_id}")
-        return subject_id
-
-    @validates('teacher_id')
-    def validate_teacher_id(self, key, teacher_id):
-        if not Teacher.query.get(teacher_id):
-            raise ValueError(f"Invalid teacher_id: {teacher_id}")
-        return teacher_id
+    # One live result per student, exam and subject; soft-deleted rows are kept as history
+    __table_args__ = (
+        db.Index('uq_results_student_exam_subject', 'student_id', 'exam_id', 'subject_id', unique=True,
+                 sqlite_where=deleted_at.is_(None), postgresql_where=deleted_at.is_(None)),
+    )
 
     @validates('score')
     def validate_score(self, key, score):
@@ -222,8 +173,33 @@ class WelfareReport(db.Model):
     
     student = relationship('Student', back_populates='welfare_reports')
 
-    @validates('student_id')
-    def validate_student_id(self, key, student_id):
-        if not Student.query.get(student_id):
-            raise ValueError(f"Invalid student_id: {student_id}")
-        return student_id
\ No newline at end of file
+# Exam Statistics Model: running aggregates per (exam, subject, class), maintained by app/stats.py
+class ExamStat(db.Model):
+    __tablename__ = 'exam_stats'
+    id = Column(Integer, primary_key=True)
+    exam_id = Column(Integer, ForeignKey('exams.id'), nullable=False, index=True)
+    subject_id = Column(Integer, ForeignKey('subjects.id'), nullable=False)
+    school_class_id = Column(Integer, ForeignKey('school_classes.id'), nullable=False)
+    result_count = Column(Integer, nullable=False, default=0, server_default='0')
+    score_total = Column(Float, nullable=False, default=0.0, server_default='0.0')
+    min_score = Column(Float, nullable=True)
+    max_score = Column(Float, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('exam_id', 'subject_id', 'school_class_id', name='uq_exam_stats_exam_subject_class'),
+    )
+
+# Table Version Model: change counters behind reference-data ETags, bumped by app/versions.py
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0, server_default='0')
+
+# Foreign keys are checked in bulk when the session flushes (see app/validation.py)
+register_foreign_key_checks(Teacher, user_id=User)
+register_foreign_key_checks(Student, school_class_id=SchoolClass, parent_id=User)
+register_foreign_key_checks(SchoolClass, form_id=Form, class_teacher_id=User)
+register_foreign_key_checks(Exam, form_id=Form)
+register_foreign_key_checks(Result, student_id=Student, exam_id=Exam, subject_id=Subject, teacher_id=Teacher)
+register_foreign_key_checks(WelfareReport, student_id=Student)
\ No newline at end of file
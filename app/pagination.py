@@ -0,0 +1,79 @@
+# app/pagination.py
+from flask import request, jsonify, current_app
+from sqlalchemy import Select
+from app import db
+from urllib.parse import urlencode
+import base64
+import json
+
+class PaginationError(ValueError):
+    """Raised for malformed ?limit= or ?after= values; rendered as a 400 by the API blueprint."""
+
+def encode_cursor(key):
+    """Encode a keyset position as an opaque, URL-safe cursor token."""
+    return base64.urlsafe_b64encode(json.dumps([key]).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """Decode a cursor produced by encode_cursor()."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        key, = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return int(key)
+    except (ValueError, TypeError, UnicodeError):
+        raise PaginationError(f"Invalid cursor: {token}")
+
+def page_args():
+    """Read (limit, after) from the query string, clamped to PAGINATION_MAX_LIMIT.
+
+    Requests without ?limit= get PAGINATION_DEFAULT_LIMIT rows. limit is None
+    only when that default is explicitly set to 0, the opt-in for clients that
+    still expect the legacy "return everything" behaviour.
+    """
+    max_limit = current_app.config['PAGINATION_MAX_LIMIT']
+    default_limit = min(current_app.config['PAGINATION_DEFAULT_LIMIT'], max_limit) or None
+    raw_limit = request.args.get('limit')
+    raw_after = request.args.get('after')
+
+    after = decode_cursor(raw_after) if raw_after else None
+    if raw_limit is None:
+        # A cursor without a limit still gets a bounded page
+        limit = default_limit or (max_limit if after is not None else None)
+    else:
+        try:
+            limit = int(raw_limit)
+        except ValueError:
+            raise PaginationError(f"Invalid limit: {raw_limit}")
+        if limit < 1:
+            raise PaginationError("limit must be a positive integer")
+    if limit is not None:
+        limit = min(limit, max_limit)
+    return limit, after
+
+def paginate(query, key_column):
+    """Apply keyset pagination on an indexed, unique column (normally the primary key).
+
+    Accepts an ORM query or a Core select (whose rows must expose the key column
+    by name). Returns (rows, next_cursor); next_cursor is None on the last page
+    or when the request is unpaginated.
+    """
+    fetch = (lambda q: db.session.execute(q).all()) if isinstance(query, Select) else (lambda q: q.all())
+    limit, after = page_args()
+    if limit is None:
+        return fetch(query), None
+    if after is not None:
+        query = query.filter(key_column > after)
+    rows = fetch(query.order_by(key_column).limit(limit + 1))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], key_column.key))
+
+def paginated_response(payload, next_cursor):
+    """jsonify a page, advertising the next cursor in X-Next-Cursor and a Link header."""
+    response = jsonify(payload)
+    if next_cursor:
+        args = request.args.to_dict()
+        args['after'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
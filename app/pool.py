@@ -0,0 +1,89 @@
+# app/pool.py
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+import logging
+import threading
+import time
+
+class PoolStats:
+    """Checkout counters and wait times for this worker's connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = {"checkouts": 0, "checkins": 0, "connects": 0, "invalidations": 0, "timeouts": 0, "slow_checkouts": 0}
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.peak_checked_out = 0
+
+    def add(self, name, count=1):
+        with self._lock:
+            self.counts[name] += count
+
+    def checked_out(self, waited, in_use, slow_after):
+        with self._lock:
+            self.counts['checkouts'] += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.peak_checked_out = max(self.peak_checked_out, in_use)
+            if waited >= slow_after:
+                self.counts['slow_checkouts'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            checkouts = self.counts['checkouts']
+            return {
+                **self.counts,
+                "wait_ms_avg": round(self.wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+                "peak_checked_out": self.peak_checked_out,
+            }
+
+# One set of counters per process; engine.dispose() recreates the pool but keeps them
+pool_stats = PoolStats()
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited and how close the pool came to exhaustion."""
+
+    # Checkouts waiting at least this long (seconds) are counted as slow
+    slow_checkout = 0.1
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.add('timeouts')
+            raise
+        pool_stats.checked_out(time.perf_counter() - start, self.checkedout(), self.slow_checkout)
+        return connection
+
+    def _do_return_conn(self, record):
+        pool_stats.add('checkins')
+        super()._do_return_conn(record)
+
+# Pools log under "<module>.<class>", which is outside the "sqlalchemy" logger that configure_logging holds at
+# WARN; keep ours there too so LOG_LEVEL=DEBUG does not log every checkout
+logging.getLogger(f"{__name__}.{MeteredQueuePool.__name__}").setLevel(logging.WARN)
+
+@event.listens_for(MeteredQueuePool, 'connect')
+def _count_connect(dbapi_connection, connection_record):
+    pool_stats.add('connects')
+
+@event.listens_for(MeteredQueuePool, 'invalidate')
+def _count_invalidate(dbapi_connection, connection_record, exception):
+    pool_stats.add('invalidations')
+
+def pool_status(engine):
+    """Current pool occupancy plus this worker's counters since start (or the last reset)."""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_out=pool.checkedout(), idle=pool.checkedin(),
+                      overflow=max(pool.overflow(), 0), max_overflow=pool._max_overflow, timeout=pool.timeout())
+    if isinstance(pool, MeteredQueuePool):
+        status.update(pool_stats.snapshot())
+    return status
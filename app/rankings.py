@@ -0,0 +1,160 @@
+# app/rankings.py
+from collections import OrderedDict, namedtuple
+from flask import current_app
+from sqlalchemy import func, select
+from app import db
+from app.models import ExamStat, Result, Student
+import threading
+
+# NumPy is imported inside the functions that use it, so workers only pay
+# for it once a ranking is first requested.
+
+# Column-oriented ranking for one exam. Per-student arrays are aligned with
+# student_ids; per-result arrays (subject_ids, row_students, scores,
+# subject_positions) hold one entry per result row, row_students indexing
+# into the per-student arrays.
+ExamRanking = namedtuple('ExamRanking', [
+    'student_ids', 'school_class_ids', 'subject_counts', 'totals', 'means',
+    'class_positions', 'form_positions',
+    'subject_ids', 'row_students', 'scores', 'subject_positions',
+])
+
+# Per-worker LRU of exam_id -> (fingerprint, ExamRanking)
+_rankings = OrderedDict()
+_rankings_lock = threading.Lock()
+
+def dense_rank(groups, values):
+    """Dense rank of values, highest first, within each group; returned in input order."""
+    import numpy as np
+    n = len(values)
+    ranks = np.empty(n, dtype=np.int64)
+    if not n:
+        return ranks
+    order = np.lexsort((-values, groups))
+    sorted_groups, sorted_values = groups[order], values[order]
+    new_group = np.empty(n, dtype=bool)
+    new_group[0] = True
+    new_group[1:] = sorted_groups[1:] != sorted_groups[:-1]
+    new_value = new_group.copy()
+    new_value[1:] |= sorted_values[1:] != sorted_values[:-1]
+    running = np.cumsum(new_value)
+    group_start = running[new_group]
+    ranks[order] = running - group_start[np.cumsum(new_group) - 1] + 1
+    return ranks
+
+def compute_rankings(student_col, class_col, subject_col, scores):
+    """Totals, means, class/form positions and per-subject form positions in one vectorized pass."""
+    import numpy as np
+    student_ids, row_students = np.unique(student_col, return_inverse=True)
+    subject_counts = np.bincount(row_students, minlength=len(student_ids))
+    # bincount returns integers for empty input, so pin the dtype for exams without results
+    totals = np.bincount(row_students, weights=scores, minlength=len(student_ids)).astype(np.float64, copy=False)
+    means = np.divide(totals, subject_counts, out=np.zeros_like(totals), where=subject_counts > 0)
+    school_class_ids = np.zeros(len(student_ids), dtype=np.int64)
+    school_class_ids[row_students] = class_col
+
+    # Round before ranking so float summation noise cannot split genuine ties
+    total_keys = np.round(totals, 6)
+    return ExamRanking(
+        student_ids=student_ids,
+        school_class_ids=school_class_ids,
+        subject_counts=subject_counts,
+        totals=totals,
+        means=means,
+        class_positions=dense_rank(school_class_ids, total_keys),
+        form_positions=dense_rank(np.zeros(len(student_ids), dtype=np.int64), total_keys),
+        subject_ids=subject_col,
+        row_students=row_students,
+        scores=scores,
+        subject_positions=dense_rank(subject_col, np.round(scores, 6)),
+    )
+
+def load_exam_columns(exam_id):
+    """(student_id, school_class_id, subject_id, score) of an exam's live results as NumPy columns."""
+    import numpy as np
+    rows = db.session.execute(
+        select(Result.student_id, Student.school_class_id, Result.subject_id, Result.score)
+        .join(Student, Student.id == Result.student_id)
+        .where(
+            Result.exam_id == exam_id, Result.deleted_at.is_(None),
+            Student.deleted_at.is_(None), Student.school_class_id.isnot(None)
+        )
+    ).all()
+    table = np.array(rows, dtype=np.float64).reshape(-1, 4)
+    ids = table[:, :3].astype(np.int64)
+    return ids[:, 0], ids[:, 1], ids[:, 2], table[:, 3]
+
+def _fingerprint(exam_id):
+    """Cheap change marker from exam_stats, so changes made by other workers are noticed.
+
+    Every change to the rows an exam is ranked on also rewrites its exam_stats
+    rows: result writes, class moves (move_student_stats) and student soft
+    deletes (their results are removed from the stats), so the count, total or
+    latest updated_at differs afterwards.
+    """
+    return tuple(
+        db.session.query(func.count(ExamStat.id), func.sum(ExamStat.result_count), func.max(ExamStat.updated_at))
+        .filter(ExamStat.exam_id == exam_id)
+        .one()
+    )
+
+def exam_rankings(exam_id):
+    """Rankings for an exam, served from the per-worker cache while its results are unchanged."""
+    cache_size = current_app.config['RANKING_CACHE_SIZE']
+    if not cache_size:
+        return compute_rankings(*load_exam_columns(exam_id))
+    fingerprint = _fingerprint(exam_id)
+    with _rankings_lock:
+        cached = _rankings.get(exam_id)
+        if cached and cached[0] == fingerprint:
+            _rankings.move_to_end(exam_id)
+            return cached[1]
+    ranking = compute_rankings(*load_exam_columns(exam_id))
+    with _rankings_lock:
+        _rankings[exam_id] = (fingerprint, ranking)
+        _rankings.move_to_end(exam_id)
+        while len(_rankings) > cache_size:
+            _rankings.popitem(last=False)
+    return ranking
+
+def invalidate_exam_rankings(*exam_ids):
+    """Drop cached rankings for the given exams, or for every exam when called without ids."""
+    with _rankings_lock:
+        if not exam_ids:
+            _rankings.clear()
+        for exam_id in exam_ids:
+            _rankings.pop(exam_id, None)
+
+def ranking_rows(ranking, school_class_ids=None):
+    """Serialize a ranking per student, in form position order, optionally limited to some classes."""
+    import numpy as np
+    selected = np.argsort(ranking.form_positions, kind='stable')
+    if school_class_ids is not None:
+        selected = selected[np.isin(ranking.school_class_ids[selected], list(school_class_ids))]
+
+    # Group result rows by student once instead of scanning per student
+    by_student = np.argsort(ranking.row_students, kind='stable')
+    bounds = np.searchsorted(ranking.row_students[by_student], np.arange(len(ranking.student_ids) + 1))
+    subject_ids, scores = ranking.subject_ids.tolist(), ranking.scores.tolist()
+    subject_positions, by_student = ranking.subject_positions.tolist(), by_student.tolist()
+    bounds = bounds.tolist()
+
+    student_ids, class_ids = ranking.student_ids.tolist(), ranking.school_class_ids.tolist()
+    counts, totals, means = ranking.subject_counts.tolist(), ranking.totals.tolist(), ranking.means.tolist()
+    class_positions, form_positions = ranking.class_positions.tolist(), ranking.form_positions.tolist()
+    return [
+        {
+            "student_id": student_ids[i],
+            "school_class_id": class_ids[i],
+            "subject_count": counts[i],
+            "total": totals[i],
+            "mean": means[i],
+            "class_position": class_positions[i],
+            "form_position": form_positions[i],
+            "subjects": [
+                {"subject_id": subject_ids[r], "score": scores[r], "position": subject_positions[r]}
+                for r in by_student[bounds[i]:bounds[i + 1]]
+            ]
+        }
+        for i in selected.tolist()
+    ]
@@ -0,0 +1,185 @@
+# app/reportcards.py
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from flask import current_app
+from jinja2 import Environment
+from sqlalchemy import func, select
+from app import db
+from app.jobs import JobError, job_output_path
+from app.models import Exam, Form, Result, SchoolClass, Student, Subject, User, WelfareReport
+from app.rankings import exam_rankings
+import csv
+import io
+import multiprocessing
+import re
+import zipfile
+
+REPORT_CARD_FORMATS = ('html', 'csv')
+
+# Render workers start from a fresh interpreter rather than a fork of a threaded worker holding pooled connections
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Autoescaped: student names and welfare remarks are user-entered
+_html_template = Environment(autoescape=True).from_string("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Report card - {{ student.name }}</title></head>
+<body>
+<h1>{{ student.name }}</h1>
+<p>Admission number: {{ student.admission_number }}<br>
+Form: {{ form_name }} &middot; Class: {{ student.class_name }} &middot; Term: {{ term }}<br>
+Class teacher: {{ student.class_teacher or "N/A" }}</p>
+{% for exam in exams if exam.results %}
+<h2>{{ exam.name }}</h2>
+<table border="1" cellpadding="4">
+<tr><th>Subject</th><th>Score</th></tr>
+{% for row in exam.results %}<tr><td>{{ row.subject }}</td><td>{{ "%.1f"|format(row.score) }}</td></tr>
+{% endfor %}</table>
+{% if exam.position %}<p>Total: {{ "%.1f"|format(exam.position.total) }} &middot; Mean: {{ "%.2f"|format(exam.position.mean) }} &middot;
+Class position: {{ exam.position.class_position }} &middot; Form position: {{ exam.position.form_position }}</p>{% endif %}
+{% endfor %}
+<h2>Welfare</h2>
+{% for report in welfare %}<p><strong>{{ report.category }}</strong> ({{ report.created_at }}): {{ report.remarks }}</p>
+{% else %}<p>No welfare reports.</p>{% endfor %}
+</body></html>
+""")
+
+def _exams_for_term(form_id, term):
+    return (
+        Exam.query
+        .filter(Exam.form_id == form_id, Exam.deleted_at.is_(None), func.lower(Exam.term) == term.strip().lower())
+        .order_by(Exam.date, Exam.id)
+        .all()
+    )
+
+def prefetch_report_cards(form_id, term):
+    """Gather everything every card in a form needs with one query per table.
+
+    Returns plain dicts and tuples only, so cards can be shipped to worker processes.
+    """
+    form = Form.query.filter_by(id=form_id, deleted_at=None).first()
+    if not form:
+        raise JobError("Form not found")
+    exams = _exams_for_term(form_id, term)
+
+    students = db.session.execute(
+        select(Student.id, Student.name, Student.admission_number, SchoolClass.name, User.username)
+        .join(SchoolClass, SchoolClass.id == Student.school_class_id)
+        .outerjoin(User, User.id == SchoolClass.class_teacher_id)
+        .where(SchoolClass.form_id == form_id, SchoolClass.deleted_at.is_(None), Student.deleted_at.is_(None))
+        .order_by(SchoolClass.name, Student.name, Student.id)
+    ).all()
+    cards = {
+        student_id: {
+            "student": {
+                "id": student_id, "name": name, "admission_number": admission_number,
+                "class_name": class_name, "class_teacher": class_teacher
+            },
+            "form_name": form.name,
+            "term": term,
+            "exams": [{"id": exam.id, "name": exam.name, "results": [], "position": None} for exam in exams],
+            "welfare": []
+        }
+        for student_id, name, admission_number, class_name, class_teacher in students
+    }
+    exam_index = {exam.id: i for i, exam in enumerate(exams)}
+
+    if exams and cards:
+        results = db.session.execute(
+            select(Result.student_id, Result.exam_id, Subject.name, Result.score)
+            .join(Subject, Subject.id == Result.subject_id)
+            .where(Result.exam_id.in_(exam_index), Result.student_id.in_(cards), Result.deleted_at.is_(None))
+            .order_by(Result.exam_id, Subject.name)
+        ).all()
+        for student_id, exam_id, subject_name, score in results:
+            cards[student_id]["exams"][exam_index[exam_id]]["results"].append({"subject": subject_name, "score": score})
+
+        for exam in exams:
+            ranking = exam_rankings(exam.id)
+            for i, student_id in enumerate(ranking.student_ids.tolist()):
+                if student_id in cards:
+                    cards[student_id]["exams"][exam_index[exam.id]]["position"] = {
+                        "total": float(ranking.totals[i]),
+                        "mean": float(ranking.means[i]),
+                        "class_position": int(ranking.class_positions[i]),
+                        "form_position": int(ranking.form_positions[i])
+                    }
+
+    if cards:
+        reports = db.session.execute(
+            select(WelfareReport.student_id, WelfareReport.category, WelfareReport.remarks, WelfareReport.created_at)
+            .where(WelfareReport.student_id.in_(cards), WelfareReport.deleted_at.is_(None))
+            .order_by(WelfareReport.created_at)
+        ).all()
+        for student_id, category, remarks, created_at in reports:
+            cards[student_id]["welfare"].append({
+                "category": category, "remarks": remarks,
+                "created_at": created_at.date().isoformat() if created_at else ""
+            })
+    return list(cards.values())
+
+def _path_part(text, fallback):
+    """One archive path component: no separators, no dot segments, never empty."""
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', str(text or '')).strip('_') or fallback
+
+def _card_filename(card, fmt):
+    student = card["student"]
+    name = _path_part(f"{student['admission_number']}_{student['name']}", f"student_{student['id']}")
+    return f"{_path_part(student['class_name'], 'class')}/{name}.{fmt}"
+
+def render_card(card, fmt):
+    """Render one card; returns its bytes."""
+    if fmt == 'html':
+        return _html_template.render(**card).encode('utf-8')
+    out = io.StringIO()
+    writer = csv.writer(out)
+    student = card["student"]
+    writer.writerow(["student", student["name"], "admission_number", student["admission_number"]])
+    writer.writerow(["form", card["form_name"], "class", student["class_name"], "term", card["term"]])
+    writer.writerow(["exam", "subject", "score"])
+    for exam in card["exams"]:
+        for row in exam["results"]:
+            writer.writerow([exam["name"], row["subject"], row["score"]])
+        if exam["position"]:
+            position = exam["position"]
+            writer.writerow([exam["name"], "TOTAL", position["total"]])
+            writer.writerow([exam["name"], "MEAN", round(position["mean"], 2)])
+            writer.writerow([exam["name"], "CLASS POSITION", position["class_position"]])
+            writer.writerow([exam["name"], "FORM POSITION", position["form_position"]])
+    for report in card["welfare"]:
+        writer.writerow(["welfare", report["category"], report["remarks"], report["created_at"]])
+    return out.getvalue().encode('utf-8')
+
+def _init_render_worker():
+    """Worker-process initializer: drop any engine connections the process came with; rendering never queries."""
+    for engines in list(getattr(db, '_app_engines', {}).values()):
+        for engine in engines.values():
+            engine.dispose(close=False)
+
+def render_chunk(cards, fmt):
+    """Worker-process entry point: render a slice of cards to (archive name, bytes) pairs."""
+    return [(_card_filename(card, fmt), render_card(card, fmt)) for card in cards]
+
+def generate_report_cards(progress, form_id, term, fmt):
+    """Job body: prefetch a form's cards, render them across processes and zip them."""
+    cards = prefetch_report_cards(form_id, term)
+    if not cards:
+        raise JobError("No students found for this form")
+    progress.start(len(cards))
+
+    chunk_size = current_app.config['REPORT_CARD_CHUNK_SIZE']
+    chunks = [cards[i:i + chunk_size] for i in range(0, len(cards), chunk_size)]
+    path = job_output_path(progress.id, f"report-cards-form{form_id}-{re.sub(r'[^A-Za-z0-9]+', '_', term)}.zip")
+    processes = current_app.config['REPORT_CARD_PROCESSES']
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        if processes == 0 or len(chunks) == 1:
+            for chunk in chunks:
+                for name, data in render_chunk(chunk, fmt):
+                    archive.writestr(name, data)
+                progress.advance(len(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(_START_METHOD),
+                                     initializer=_init_render_worker) as pool:
+                pending = {pool.submit(render_chunk, chunk, fmt): len(chunk) for chunk in chunks}
+                for future in as_completed(pending):
+                    for name, data in future.result():
+                        archive.writestr(name, data)
+                    progress.advance(pending[future])
+    return path
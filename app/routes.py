@@ -1,17 +1,40 @@
-from flask import Blueprint, request, jsonify
-from flask_bcrypt import Bcrypt
+from flask import Blueprint, Response, request, jsonify, current_app, send_file, stream_with_context
 from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity, create_access_token # Added JWT imports
 from datetime import datetime
 from app import db
 from app.models import User, Student, SchoolClass, Subject, Exam, Result, WelfareReport, Teacher, Form, TeacherSubject
+from app.auth import current_principal, invalidate_principal, bump_token_version, issue_tokens
+from app.cache import cache_backend, cache_stats, cached
+from app.dialects import upsert
+from app.directory import teacher_query, teacher_directory_rows, teacher_directory_page, invalidate_teacher_directory
+from app.exports import (
+    EXPORT_FORMATS, ExportError, export_filters, export_results_job, gradebook_chunks, require_parquet,
+    results_export_response
+)
+from app.fieldsets import FieldsetError, sparse_query, sparse_schema
+from app.hashing import HashingBusy, hash_password, verify_and_upgrade
+from app.imports import ImportFileError, import_students, read_upload
+from app.jobs import get_job, job_summary, submit_job
+from app.loaders import with_profile
+from app.pagination import PaginationError, page_args, paginate, paginated_response
+from app.pool import pool_status
+from app.reportcards import REPORT_CARD_FORMATS, generate_report_cards
+from app.rankings import exam_rankings, invalidate_exam_rankings, ranking_rows
+from app.serializers import compiled, row_serializer
+from app.stats import apply_result_changes, exam_stat_rows, move_student_stats
+from app.versions import bump_table_versions, conditional
+from app.streaming import wants_ndjson, ndjson_response
+from app.scopes import scoped_student, student_visibility, visible_students
 from app.schemas import UserSchema, StudentSchema, SchoolClassSchema, SubjectSchema, ExamSchema, ResultSchema, WelfareReportSchema, FormSchema
-from sqlalchemy.orm import joinedload
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
 import logging
+import math
+import os
 
 logger = logging.getLogger(__name__)
 
 api_bp = Blueprint('api', __name__)
-bcrypt = Bcrypt()
 jwt = JWTManager()  # Initialize JWTManager (ensure it's configured in your app)
 
 # --- Helper Function for Soft Deletes ---
@@ -19,6 +42,15 @@ def is_soft_deleted(model_instance):
     """Check if a model instance is soft-deleted by checking the deleted_at field."""
     return getattr(model_instance, 'deleted_at', None) is not None
 
+@api_bp.errorhandler(PaginationError)
+@api_bp.errorhandler(FieldsetError)
+def handle_query_argument_error(e):
+    return jsonify({"message": str(e)}), 400
+
+@api_bp.errorhandler(HashingBusy)
+def handle_hashing_busy(e):
+    return jsonify({"message": str(e)}), 503, {"Retry-After": "1"}
+
 # --- Authentication Routes ---
 
 @api_bp.route('/login', methods=['POST'])
@@ -32,18 +64,29 @@ def login():
     password = data['password']
 
     user = User.query.filter_by(email=email, deleted_at=None).first()
-    if not user or not bcrypt.check_password_hash(user.password, password):
+    if not user or not verify_and_upgrade(user, password):
         return jsonify({"message": "Invalid email or password"}), 401
+    if db.session.is_modified(user):
+        db.session.commit()  # Persist a hash upgraded to the configured work factor
 
-    from flask_jwt_extended import create_access_token  # Import here or globally
-    access_token = create_access_token(identity=user.id)  # Generate JWT token
+    tokens = issue_tokens(user.id)  # Generate JWT token(s)
     user_data = UserSchema().dump(user)
 
     return jsonify({
         "user": user_data,
-        "token": access_token  # Return token to frontend
+        **tokens  # Return token to frontend
     }), 200
 
+@api_bp.route('/token/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh_token():
+    """Issue a fresh access token with current role and scope claims."""
+    current_user_id = get_jwt_identity()
+    user = User.query.filter_by(id=current_user_id, deleted_at=None).first()
+    if not user:
+        return jsonify({"message": "User not found"}), 401
+    return jsonify(issue_tokens(user.id)), 200
+
 # --- User Routes ---
 
 @api_bp.route('/users', methods=['POST'])
@@ -56,10 +99,11 @@ def create_user():
     if User.query.filter_by(email=data['email'], deleted_at=None).first():
         return jsonify({"message": "Email already registered"}), 409
 
+    hashed_password = hash_password(data['password'])  # outside the try: a busy hashing pool answers 503
     try:
-        hashed_password = bcrypt.generate_password_hash(data['password']).decode('utf-8')
         new_user = User(username=data['username'], email=data['email'], password=hashed_password, role=data['role'], deleted_at=None)
         db.session.add(new_user)
+        bump_table_versions('users')
         db.session.commit()
         return jsonify(UserSchema().dump(new_user)), 201
     except Exception as e:
@@ -68,21 +112,21 @@ def create_user():
 
 @api_bp.route('/users', methods=['GET'])
 @jwt_required()
+@cached('users')
 def get_users():
     """Retrieve all users (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
-    users = User.query.filter(User.deleted_at.is_(None)).all()
-    return jsonify(UserSchema(many=True).dump(users))
+    schema = sparse_schema(UserSchema, many=True)
+    users, next_cursor = paginate(sparse_query(User.query.filter(User.deleted_at.is_(None)), User, schema), User.id)
+    return paginated_response(compiled(schema)(users), next_cursor)
 
 @api_bp.route('/user/roles', methods=['GET'])
 @jwt_required()
 def get_user_roles():
     """Get additional roles for a user (admin or self)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     target_user_id = request.args.get('user_id')
     target_user = User.query.filter_by(id=target_user_id, deleted_at=None).first()
     
@@ -102,38 +146,37 @@ def get_user_roles():
 @jwt_required()
 def get_users_by_role():
     """Retrieve users by role (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     role = request.args.get('role')
     if not role:
         return jsonify({"message": "Role parameter is required"}), 400
-    users = User.query.filter_by(role=role, deleted_at=None).all()
-    return jsonify(UserSchema(many=True).dump(users))
+    schema = sparse_schema(UserSchema, many=True)
+    users = sparse_query(User.query.filter_by(role=role, deleted_at=None), User, schema).all()
+    return jsonify(compiled(schema)(users))
 
 @api_bp.route('/users/search', methods=['GET'])
 @jwt_required()
 def search_user():
     """Search for a user by username (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     username = request.args.get('username')
     if not username:
         return jsonify({"message": "Username is required"}), 400
-    target_user = User.query.filter_by(username=username, deleted_at=None).first()
+    schema = sparse_schema(UserSchema)
+    target_user = sparse_query(User.query.filter_by(username=username, deleted_at=None), User, schema).first()
     if target_user:
-        return jsonify(UserSchema().dump(target_user))
+        return jsonify(compiled(schema)(target_user))
     return jsonify({"message": "User not found"}), 404
 
 @api_bp.route('/users/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_user(id):
     """Update a user (admin or self)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     target_user = User.query.filter_by(id=id, deleted_at=None).first()
     if not target_user:
         return jsonify({"message": "User not found"}), 404
@@ -142,14 +185,21 @@ def update_user(id):
     data = request.get_json()
     if not data:
         return jsonify({"message": "No data provided"}), 400
+    # Hashed outside the try: a busy hashing pool answers 503
+    hashed_password = hash_password(data['password']) if 'password' in data else None
     try:
         target_user.username = data.get('username', target_user.username)
         target_user.email = data.get('email', target_user.email)
-        if 'password' in data:
-            target_user.password = bcrypt.generate_password_hash(data['password']).decode('utf-8')
+        if hashed_password is not None:
+            target_user.password = hashed_password
         if 'role' in data and user.role == 'admin':  # Only admin can change role
+            if data['role'] != target_user.role:
+                bump_token_version(target_user.id)
             target_user.role = data['role']
+        bump_table_versions('users')
         db.session.commit()
+        invalidate_principal(target_user.id)
+        invalidate_teacher_directory()
         return jsonify(UserSchema().dump(target_user))
     except Exception as e:
         db.session.rollback()
@@ -159,8 +209,7 @@ def update_user(id):
 @jwt_required()
 def delete_user(id):
     """Soft-delete a user (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     target_user = User.query.filter_by(id=id, deleted_at=None).first()
@@ -168,7 +217,11 @@ def delete_user(id):
         return jsonify({"message": "User not found"}), 404
     try:
         target_user.deleted_at = datetime.utcnow()
+        bump_token_version(target_user.id)
+        bump_table_versions('users')
         db.session.commit()
+        invalidate_principal(target_user.id)
+        invalidate_teacher_directory()
         return jsonify({"message": "User soft-deleted successfully"})
     except Exception as e:
         db.session.rollback()
@@ -180,8 +233,7 @@ def delete_user(id):
 @jwt_required()
 def create_student():
     """Create a student (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     data = request.get_json()
@@ -210,27 +262,52 @@ def create_student():
                 subject = Subject.query.filter_by(name=subject_name.strip(), deleted_at=None).first()
                 if subject:
                     new_student.subjects.append(subject)
+        bump_table_versions('students')
         db.session.commit()
         return jsonify(StudentSchema().dump(new_student)), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to create student", "error": str(e)}), 500
 
+@api_bp.route('/students/import', methods=['POST'])
+@jwt_required()
+def import_students_file():
+    """Bulk-create students from an uploaded CSV or XLSX file (admin only)."""
+    user = current_principal()
+    if not user or user.role != 'admin':
+        return jsonify({"message": "Unauthorized: Admin access required"}), 401
+    upload = request.files.get('file')
+    if not upload:
+        return jsonify({"message": "No file provided"}), 400
+    dry_run = request.values.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    try:
+        created, errors = import_students(read_upload(upload), dry_run=dry_run)
+        if not created:
+            db.session.rollback()
+            return jsonify({"message": "No valid rows to import", "created": 0, "errors": errors, "dry_run": dry_run}), 400
+        if dry_run:
+            db.session.rollback()
+        else:
+            bump_table_versions('students')
+            db.session.commit()
+        return jsonify({"created": created, "errors": errors, "dry_run": dry_run}), 200 if dry_run else 201
+    except ImportFileError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed to import students", "error": str(e)}), 500
+
 @api_bp.route('/students', methods=['GET'])
 @jwt_required()
+@cached('students', 'school_classes', 'subjects')
 def get_students():
     """Retrieve students (teacher or admin)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role not in ['teacher', 'admin']:
         return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
     
-    if user.role == 'teacher':
-        classes = SchoolClass.query.filter_by(class_teacher_id=current_user_id, deleted_at=None).all()
-        class_ids = [cls.id for cls in classes]
-        students = Student.query.filter(Student.school_class_id.in_(class_ids), Student.deleted_at.is_(None)).all()
-    else:  # admin
-        students = Student.query.filter(Student.deleted_at.is_(None)).all()
+    students, next_cursor = paginate(with_profile(visible_students(user), 'students.list'), Student.id)
 
     students_data = [
         {
@@ -244,17 +321,16 @@ def get_students():
         }
         for student in students
     ]
-    return jsonify(students_data)
+    return paginated_response(students_data, next_cursor)
 
 @api_bp.route('/parents/<int:parent_id>/students', methods=['GET'])
 @jwt_required()
 def get_students_by_parent(parent_id):
     """Retrieve students for a parent (parent only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'parent' or user.id != parent_id:
         return jsonify({"message": "Unauthorized: Can only view own students"}), 401
-    students = Student.query.filter_by(parent_id=parent_id, deleted_at=None).all()
+    students = with_profile(Student.query.filter_by(parent_id=parent_id, deleted_at=None), 'students.by_parent').all()
     students_data = [
         {
             "id": student.id,
@@ -271,19 +347,14 @@ def get_students_by_parent(parent_id):
 @jwt_required()
 def get_student_by_id(id):
     """Retrieve a student (parent, teacher, or admin)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    student = Student.query.filter_by(id=id, deleted_at=None).first()
+    user = current_principal()
+    student, visible = scoped_student(user, id)
     if not student:
         return jsonify({"message": "Student not found"}), 404
     
-    if user.role == 'parent' and student.parent_id != current_user_id:
-        return jsonify({"message": "Unauthorized: Not your student"}), 401
-    elif user.role == 'teacher':
-        classes = SchoolClass.query.filter_by(class_teacher_id=current_user_id, deleted_at=None).all()
-        class_ids = [cls.id for cls in classes]
-        if student.school_class_id not in class_ids:
-            return jsonify({"message": "Unauthorized: Not in your class"}), 401
+    if not visible:
+        message = "Unauthorized: Not your student" if user.role == 'parent' else "Unauthorized: Not in your class"
+        return jsonify({"message": message}), 401
     
     class_teacher = student.school_class.class_teacher if student.school_class and not is_soft_deleted(student.school_class) else None
     student_data = {
@@ -302,19 +373,14 @@ def get_student_by_id(id):
 @jwt_required()
 def get_student_subjects(student_id):
     """Retrieve subjects for a student (parent, teacher, or admin)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    student = Student.query.filter_by(id=student_id, deleted_at=None).first()
+    user = current_principal()
+    student, visible = scoped_student(user, student_id)
     if not student:
         return jsonify({"message": "Student not found"}), 404
     
-    if user.role == 'parent' and student.parent_id != current_user_id:
-        return jsonify({"message": "Unauthorized: Not your student"}), 401
-    elif user.role == 'teacher':
-        classes = SchoolClass.query.filter_by(class_teacher_id=current_user_id, deleted_at=None).all()
-        class_ids = [cls.id for cls in classes]
-        if student.school_class_id not in class_ids:
-            return jsonify({"message": "Unauthorized: Not in your class"}), 401
+    if not visible:
+        message = "Unauthorized: Not your student" if user.role == 'parent' else "Unauthorized: Not in your class"
+        return jsonify({"message": message}), 401
     
     subjects = student.subjects
     subjects_data = [{"id": subject.id, "name": subject.name} for subject in subjects if not is_soft_deleted(subject)]
@@ -324,8 +390,7 @@ def get_student_subjects(student_id):
 @jwt_required()
 def update_student(id):
     """Update a student (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     student = Student.query.filter_by(id=id, deleted_at=None).first()
@@ -340,7 +405,10 @@ def update_student(id):
             school_class = SchoolClass.query.filter_by(id=data['school_class_id'], deleted_at=None).first()
             if not school_class:
                 return jsonify({"message": "School class not found"}), 404
-            student.school_class_id = data['school_class_id']
+            if school_class.id != student.school_class_id:
+                previous_class_id = student.school_class_id
+                student.school_class_id = school_class.id
+                move_student_stats([student.id], [previous_class_id])
         student.admission_number = data.get('admission_number', student.admission_number)
         if 'parent_email' in data:
             parent = User.query.filter_by(email=data['parent_email'], role='parent', deleted_at=None).first()
@@ -354,7 +422,10 @@ def update_student(id):
                 subject = Subject.query.filter_by(name=subject_name.strip(), deleted_at=None).first()
                 if subject:
                     student.subjects.append(subject)
+        bump_table_versions('students')
         db.session.commit()
+        if 'school_class_id' in data:
+            invalidate_exam_rankings()  # Class positions depend on class membership
         return jsonify(StudentSchema().dump(student))
     except Exception as e:
         db.session.rollback()
@@ -364,8 +435,7 @@ def update_student(id):
 @jwt_required()
 def delete_student(id):
     """Soft-delete a student (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     student = Student.query.filter_by(id=id, deleted_at=None).first()
@@ -373,7 +443,13 @@ def delete_student(id):
         return jsonify({"message": "Student not found"}), 404
     try:
         student.deleted_at = datetime.utcnow()
+        # Their results stay on record but leave the exam statistics, as they leave the rankings
+        apply_result_changes(removed=db.session.query(
+            Result.student_id, Result.exam_id, Result.subject_id, Result.score
+        ).filter(Result.student_id == student.id, Result.deleted_at.is_(None)).all())
+        bump_table_versions('students')
         db.session.commit()
+        invalidate_exam_rankings()
         return jsonify({"message": "Student soft-deleted successfully"})
     except Exception as e:
         db.session.rollback()
@@ -383,8 +459,7 @@ def delete_student(id):
 @jwt_required()
 def promote_students():
     """Promote students (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     data = request.get_json()
@@ -414,14 +489,21 @@ def promote_students():
         if not students:
             return jsonify({"message": "No valid students found"}), 404
 
+        moved, previous_class_ids = [], set()
         for student in students:
             current_class = SchoolClass.query.filter_by(id=student.school_class_id, deleted_at=None).first()
             if current_class and current_class.form.name == target_form_name:
                 continue
+            if student.school_class_id != target_class.id:
+                moved.append(student.id)
+                previous_class_ids.add(student.school_class_id)
             student.school_class_id = target_class.id
+        move_student_stats(moved, previous_class_ids)
 
+        bump_table_versions('students', 'school_classes')
         db.session.commit()
-        updated_students = StudentSchema(many=True).dump(students)
+        invalidate_exam_rankings()
+        updated_students = compiled(StudentSchema(many=True))(students)
         return jsonify({
             "message": f"Students promoted to {target_form_name}",
             "students": updated_students
@@ -436,8 +518,7 @@ def promote_students():
 @jwt_required()
 def create_class():
     """Create a class (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     data = request.get_json()
@@ -460,7 +541,11 @@ def create_class():
             deleted_at=None
         )
         db.session.add(new_class)
+        bump_token_version(new_class.class_teacher_id)
+        bump_table_versions('school_classes')
         db.session.commit()
+        invalidate_principal(new_class.class_teacher_id)
+        invalidate_teacher_directory()
         return jsonify({
             "id": new_class.id,
             "name": new_class.name,
@@ -475,10 +560,12 @@ def create_class():
 
 @api_bp.route('/classes', methods=['GET'])
 @jwt_required()
+@conditional('school_classes', 'forms', 'users')
+@cached('school_classes', 'forms', 'users')
 def get_classes():
     """Retrieve classes (teacher or admin)."""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role not in ['teacher', 'admin']:
         return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
     
@@ -486,9 +573,10 @@ def get_classes():
         class_teacher_id = request.args.get('class_teacher_id')
         if class_teacher_id and int(class_teacher_id) != current_user_id:
             return jsonify({"message": "Unauthorized: Can only view own classes"}), 401
-        classes = SchoolClass.query.filter_by(class_teacher_id=current_user_id, deleted_at=None).all()
+        query = SchoolClass.query.filter_by(class_teacher_id=current_user_id, deleted_at=None)
     else:  # admin
-        classes = SchoolClass.query.filter(SchoolClass.deleted_at.is_(None)).all()
+        query = SchoolClass.query.filter(SchoolClass.deleted_at.is_(None))
+    classes = with_profile(query, 'classes.list').all()
 
     class_list = [
         {
@@ -508,7 +596,7 @@ def get_classes():
 def get_class_by_id(id):
     """Retrieve a class (teacher or admin)."""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     class_obj = SchoolClass.query.filter_by(id=id, deleted_at=None).first()
     if not class_obj:
         return jsonify({"message": "Class not found"}), 404
@@ -527,8 +615,7 @@ def get_class_by_id(id):
 @jwt_required()
 def update_class(id):
     """Update a class (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     class_obj = SchoolClass.query.filter_by(id=id, deleted_at=None).first()
@@ -537,6 +624,7 @@ def update_class(id):
     data = request.get_json()
     if not data:
         return jsonify({"message": "No data provided"}), 400
+    previous_teacher_id = class_obj.class_teacher_id
     try:
         if 'form_id' in data:
             form = Form.query.filter_by(id=data['form_id'], deleted_at=None).first()
@@ -549,7 +637,12 @@ def update_class(id):
                 return jsonify({"message": "Class teacher not found or not a teacher"}), 404
             class_obj.class_teacher_id = class_teacher.id if class_teacher else None
         class_obj.name = data.get('name', class_obj.name)
+        if class_obj.class_teacher_id != previous_teacher_id:
+            bump_token_version(previous_teacher_id, class_obj.class_teacher_id)
+        bump_table_versions('school_classes')
         db.session.commit()
+        invalidate_principal(previous_teacher_id, class_obj.class_teacher_id)
+        invalidate_teacher_directory()
         return jsonify({
             "id": class_obj.id,
             "name": class_obj.name,
@@ -566,8 +659,7 @@ def update_class(id):
 @jwt_required()
 def delete_class(id):
     """Soft-delete a class (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     class_obj = SchoolClass.query.filter_by(id=id, deleted_at=None).first()
@@ -578,7 +670,13 @@ def delete_class(id):
         students = Student.query.filter_by(school_class_id=id, deleted_at=None).all()
         for student in students:
             student.school_class_id = None
+        move_student_stats([student.id for student in students], [id])
+        bump_token_version(class_obj.class_teacher_id)
+        bump_table_versions('school_classes')
         db.session.commit()
+        invalidate_principal(class_obj.class_teacher_id)
+        invalidate_teacher_directory()
+        invalidate_exam_rankings()
         return jsonify({"message": "Class soft-deleted successfully"})
     except Exception as e:
         db.session.rollback()
@@ -586,12 +684,14 @@ def delete_class(id):
 
 # --- Subject Routes ---
 
+# Tables read by each collection a subject listing can ?include=
+SUBJECT_INCLUDE_TABLES = {'results': ('results',), 'enrolled_students': ('students',), 'teaching_teachers': ('teachers', 'users')}
+
 @api_bp.route('/subjects', methods=['POST'])
 @jwt_required()
 def create_subject():
     """Create a subject (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     data = request.get_json()
@@ -600,6 +700,7 @@ def create_subject():
     try:
         new_subject = Subject(name=data['name'], deleted_at=None)
         db.session.add(new_subject)
+        bump_table_versions('subjects')
         db.session.commit()
         return jsonify(SubjectSchema().dump(new_subject)), 201
     except Exception as e:
@@ -608,34 +709,35 @@ def create_subject():
 
 @api_bp.route('/subjects', methods=['GET'])
 @jwt_required()
+@conditional('subjects', include=SUBJECT_INCLUDE_TABLES)
+@cached('subjects', include=SUBJECT_INCLUDE_TABLES)
 def get_subjects():
     """Retrieve subjects (teacher or admin)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role not in ['teacher', 'admin']:
         return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
-    subjects = Subject.query.filter(Subject.deleted_at.is_(None)).all()
-    return jsonify(SubjectSchema(many=True).dump(subjects))
+    schema = sparse_schema(SubjectSchema, many=True)
+    subjects, next_cursor = paginate(sparse_query(Subject.query.filter(Subject.deleted_at.is_(None)), Subject, schema), Subject.id)
+    return paginated_response(compiled(schema)(subjects), next_cursor)
 
 @api_bp.route('/subjects/<int:id>', methods=['GET'])
 @jwt_required()
 def get_subject_by_id(id):
     """Retrieve a subject (teacher or admin)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role not in ['teacher', 'admin']:
         return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
-    subject = Subject.query.filter_by(id=id, deleted_at=None).first()
+    schema = sparse_schema(SubjectSchema)
+    subject = sparse_query(Subject.query.filter_by(id=id, deleted_at=None), Subject, schema).first()
     if subject:
-        return jsonify(SubjectSchema().dump(subject))
+        return jsonify(compiled(schema)(subject))
     return jsonify({"message": "Subject not found"}), 404
 
 @api_bp.route('/subjects/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_subject(id):
     """Update a subject (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     subject = Subject.query.filter_by(id=id, deleted_at=None).first()
@@ -646,7 +748,9 @@ def update_subject(id):
         return jsonify({"message": "No data provided"}), 400
     try:
         subject.name = data.get('name', subject.name)
+        bump_table_versions('subjects')
         db.session.commit()
+        invalidate_teacher_directory()
         return jsonify(SubjectSchema().dump(subject))
     except Exception as e:
         db.session.rollback()
@@ -656,8 +760,7 @@ def update_subject(id):
 @jwt_required()
 def delete_subject(id):
     """Soft-delete a subject (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     subject = Subject.query.filter_by(id=id, deleted_at=None).first()
@@ -665,7 +768,9 @@ def delete_subject(id):
         return jsonify({"message": "Subject not found"}), 404
     try:
         subject.deleted_at = datetime.utcnow()
+        bump_table_versions('subjects')
         db.session.commit()
+        invalidate_teacher_directory()
         return jsonify({"message": "Subject soft-deleted successfully"})
     except Exception as e:
         db.session.rollback()
@@ -673,23 +778,24 @@ def delete_subject(id):
 
 # --- Exam Routes ---
 
+# Tables read by each collection an exam listing can ?include=
+EXAM_INCLUDE_TABLES = {'results': ('results',)}
+
 @api_bp.route('/exams', methods=['POST'])
 @jwt_required()
 def create_exam():
     """Create an exam (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     data = request.get_json()
-    logger.debug(f"Received data for creating exam: {data}")
     required_fields = ['name', 'form_name']
     if not data or any(field not in data for field in required_fields):
-        logger.debug("Missing required fields detected")
+        logger.debug("Exam rejected: missing required fields")
         return jsonify({"message": "Missing required fields"}), 400
     form = Form.query.filter_by(name=data['form_name'], deleted_at=None).first()
     if not form:
-        logger.debug(f"Form not found for name: {data['form_name']}")
+        logger.debug("Exam rejected: form %r not found", data['form_name'])
         return jsonify({"message": "Form not found"}), 404
     try:
         date_value = None
@@ -697,7 +803,7 @@ def create_exam():
             try:
                 date_value = datetime.strptime(data['date'], '%Y-%m-%dT%H:%M:%S.%fZ')
             except ValueError as e:
-                logger.debug(f"Invalid date format: {data['date']}, error: {str(e)}")
+                logger.debug("Exam rejected: invalid date %r (%s)", data['date'], e)
                 return jsonify({"message": "Invalid date format", "error": str(e)}), 400
 
         new_exam = Exam(
@@ -708,6 +814,7 @@ def create_exam():
             deleted_at=None
         )
         db.session.add(new_exam)
+        bump_table_versions('exams')
         db.session.commit()
         return jsonify(ExamSchema().dump(new_exam)), 201
     except Exception as e:
@@ -716,34 +823,35 @@ def create_exam():
 
 @api_bp.route('/exams', methods=['GET'])
 @jwt_required()
+@conditional('exams', 'forms', include=EXAM_INCLUDE_TABLES)
+@cached('exams', 'forms', include=EXAM_INCLUDE_TABLES)
 def get_exams():
     """Retrieve exams (teacher or admin)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role not in ['teacher', 'admin']:
         return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
-    exams = Exam.query.filter(Exam.deleted_at.is_(None)).all()
-    return jsonify(ExamSchema(many=True).dump(exams))
+    schema = sparse_schema(ExamSchema, many=True)
+    exams, next_cursor = paginate(sparse_query(Exam.query.filter(Exam.deleted_at.is_(None)), Exam, schema), Exam.id)
+    return paginated_response(compiled(schema)(exams), next_cursor)
 
 @api_bp.route('/exams/<int:id>', methods=['GET'])
 @jwt_required()
 def get_exam_by_id(id):
     """Retrieve an exam (teacher or admin)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role not in ['teacher', 'admin']:
         return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
-    exam = Exam.query.filter_by(id=id, deleted_at=None).first()
+    schema = sparse_schema(ExamSchema)
+    exam = sparse_query(Exam.query.filter_by(id=id, deleted_at=None), Exam, schema).first()
     if exam:
-        return jsonify(ExamSchema().dump(exam))
+        return jsonify(compiled(schema)(exam))
     return jsonify({"message": "Exam not found"}), 404
 
 @api_bp.route('/exams/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_exam(id):
     """Update an exam (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     exam = Exam.query.filter_by(id=id, deleted_at=None).first()
@@ -759,6 +867,7 @@ def update_exam(id):
             if not form:
                 return jsonify({"message": "Form not found"}), 404
             exam.form_id = data['form_id']
+        bump_table_versions('exams')
         db.session.commit()
         return jsonify(ExamSchema().dump(exam))
     except Exception as e:
@@ -769,8 +878,7 @@ def update_exam(id):
 @jwt_required()
 def delete_exam(id):
     """Soft-delete an exam (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     exam = Exam.query.filter_by(id=id, deleted_at=None).first()
@@ -778,21 +886,82 @@ def delete_exam(id):
         return jsonify({"message": "Exam not found"}), 404
     try:
         exam.deleted_at = datetime.utcnow()
+        bump_table_versions('exams')
         db.session.commit()
         return jsonify({"message": "Exam soft-deleted successfully"})
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to soft-delete exam", "error": str(e)}), 500
 
+@api_bp.route('/exams/<int:id>/stats', methods=['GET'])
+@jwt_required()
+@cached('results', 'students', 'school_classes', 'exams')
+def get_exam_stats(id):
+    """Retrieve per-class and per-subject score statistics for an exam (teacher or admin)."""
+    user = current_principal()
+    if not user or user.role not in ['teacher', 'admin']:
+        return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
+    exam = Exam.query.filter_by(id=id, deleted_at=None).first()
+    if not exam:
+        return jsonify({"message": "Exam not found"}), 404
+
+    class_stats, subject_totals = [], {}
+    for stat in exam_stat_rows(exam.id):
+        if user.role == 'admin' or stat.school_class_id in user.class_ids:  # Teachers see their own classes
+            class_stats.append({
+                "subject_id": stat.subject_id,
+                "school_class_id": stat.school_class_id,
+                "count": stat.result_count,
+                "mean": stat.score_total / stat.result_count if stat.result_count else None,
+                "min": stat.min_score,
+                "max": stat.max_score
+            })
+        # Form-wide roll-up across every class that sat the exam
+        totals = subject_totals.setdefault(stat.subject_id, {"count": 0, "total": 0.0, "min": None, "max": None})
+        totals["count"] += stat.result_count
+        totals["total"] += stat.score_total
+        if stat.min_score is not None:
+            totals["min"] = stat.min_score if totals["min"] is None else min(totals["min"], stat.min_score)
+            totals["max"] = stat.max_score if totals["max"] is None else max(totals["max"], stat.max_score)
+
+    subject_stats = [
+        {
+            "subject_id": subject_id,
+            "count": totals["count"],
+            "mean": totals["total"] / totals["count"] if totals["count"] else None,
+            "min": totals["min"],
+            "max": totals["max"]
+        }
+        for subject_id, totals in subject_totals.items()
+    ]
+    return jsonify({"exam_id": exam.id, "form_id": exam.form_id, "classes": class_stats, "subjects": subject_stats}), 200
+
+@api_bp.route('/exams/<int:id>/rankings', methods=['GET'])
+@jwt_required()
+@cached('results', 'students', 'school_classes', 'exams')
+def get_exam_rankings(id):
+    """Retrieve class and form positions for every student who sat an exam (teacher or admin)."""
+    user = current_principal()
+    if not user or user.role not in ['teacher', 'admin']:
+        return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
+    exam = Exam.query.filter_by(id=id, deleted_at=None).first()
+    if not exam:
+        return jsonify({"message": "Exam not found"}), 404
+
+    school_class_ids = None if user.role == 'admin' else set(user.class_ids)  # Teachers see their own classes
+    school_class_id = request.args.get('school_class_id', type=int)
+    if school_class_id is not None:
+        school_class_ids = {school_class_id} if school_class_ids is None else school_class_ids & {school_class_id}
+    rows = ranking_rows(exam_rankings(exam.id), school_class_ids)
+    return jsonify({"exam_id": exam.id, "form_id": exam.form_id, "rankings": rows}), 200
+
 # --- Result Routes ---
 
 @api_bp.route('/results', methods=['POST'])
 @jwt_required()
 def create_result():
     """Create a result (teacher only)."""
-    print("DEBUG: create_result called")  # Debug log
-    current_user_id = get_jwt_identity()  # User.id from JWT
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'teacher':
         return jsonify({"message": "Unauthorized: Teacher access required"}), 401
 
@@ -802,21 +971,20 @@ def create_result():
         return jsonify({"message": "Missing required fields"}), 400
 
     # Verify the teacher_id matches the current user's Teacher record
-    teacher = Teacher.query.filter_by(id=data['teacher_id'], user_id=current_user_id, deleted_at=None).first()
-    if not teacher:
+    if not user.teacher_id or user.teacher_id != data['teacher_id']:
         return jsonify({"message": "Unauthorized: Invalid teacher ID or not your profile"}), 401
 
     try:
-        student = Student.query.filter_by(id=data['student_id'], deleted_at=None).first()
+        student, visible = scoped_student(user, data['student_id'])
         subject = Subject.query.filter_by(id=data['subject_id'], deleted_at=None).first()
         exam = Exam.query.filter_by(id=data['exam_id'], deleted_at=None).first()
         if not student or not subject or not exam:
             return jsonify({"message": "Invalid student, subject, or exam ID"}), 404
 
-        classes = SchoolClass.query.filter_by(class_teacher_id=current_user_id, deleted_at=None).all()
-        class_ids = [cls.id for cls in classes]
-        if student.school_class_id not in class_ids:
+        if not visible:
             return jsonify({"message": "Unauthorized: Student not in your class"}), 401
+        if Result.query.filter_by(student_id=student.id, exam_id=exam.id, subject_id=subject.id, deleted_at=None).first():
+            return jsonify({"message": "Result already exists for this student, exam and subject; update it instead"}), 409
 
         new_result = Result(
             student_id=data['student_id'],
@@ -827,82 +995,249 @@ def create_result():
             deleted_at=None
         )
         db.session.add(new_result)
+        apply_result_changes(added=[(student.id, exam.id, subject.id, new_result.score)])
+        bump_table_versions('results')
         db.session.commit()
+        invalidate_exam_rankings(exam.id)
         return jsonify(ResultSchema().dump(new_result)), 201
+    except IntegrityError:
+        db.session.rollback()  # recorded concurrently since the check above
+        return jsonify({"message": "Result already exists for this student, exam and subject; update it instead"}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to create result", "error": str(e)}), 500
 
+def _as_id(value):
+    """A positive integer id from JSON (a number or a string of digits), or None."""
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        return None
+    return value
+
+def _as_score(value):
+    """A finite numeric score from JSON (a number or a numeric string), or None."""
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return None
+    return value
+
+def _mark_sheet_row(row, exam_id, subject_id):
+    """(student_id, score, error) for one mark-sheet row; error is None when the row is well formed."""
+    if not isinstance(row, dict):
+        return None, None, "Each result must be an object"
+    student_id = _as_id(row.get('student_id'))
+    if student_id is None:
+        return None, None, "student_id is required and must be a positive integer"
+    score = _as_score(row.get('score'))
+    if score is None:
+        return student_id, None, "score is required and must be a number"
+    # Rows may repeat the sheet's exam and subject, but cannot point elsewhere
+    if 'exam_id' in row and _as_id(row['exam_id']) != exam_id:
+        return student_id, score, "exam_id does not match the mark sheet"
+    if 'subject_id' in row and _as_id(row['subject_id']) != subject_id:
+        return student_id, score, "subject_id does not match the mark sheet"
+    return student_id, score, None
+
+@api_bp.route('/results/batch', methods=['POST'])
+@jwt_required()
+def create_results_batch():
+    """Record a whole mark sheet for one exam and subject (teacher only)."""
+    user = current_principal()
+    if not user or user.role != 'teacher':
+        return jsonify({"message": "Unauthorized: Teacher access required"}), 401
+
+    data = request.get_json()
+    required_fields = ['exam_id', 'subject_id', 'teacher_id', 'results']
+    if not isinstance(data, dict) or any(field not in data for field in required_fields) or not isinstance(data['results'], list):
+        return jsonify({"message": "Missing required fields"}), 400
+    exam_id, subject_id = _as_id(data['exam_id']), _as_id(data['subject_id'])
+    school_class_id = _as_id(data.get('school_class_id'))
+    if exam_id is None or subject_id is None or (data.get('school_class_id') is not None and school_class_id is None):
+        return jsonify({"message": "exam_id, subject_id and school_class_id must be positive integers"}), 400
+    if not user.teacher_id or user.teacher_id != _as_id(data['teacher_id']):
+        return jsonify({"message": "Unauthorized: Invalid teacher ID or not your profile"}), 401
+
+    exam = Exam.query.filter_by(id=exam_id, deleted_at=None).first()
+    subject = Subject.query.filter_by(id=subject_id, deleted_at=None).first()
+    if not exam or not subject:
+        return jsonify({"message": "Invalid subject or exam ID"}), 404
+
+    # Coerce every row before anything is looked up; a malformed row only fails itself
+    rows = [_mark_sheet_row(row, exam.id, subject.id) for row in data['results']]
+    student_ids = {student_id for student_id, _, error in rows if error is None}
+
+    # Scope check for every student on the sheet in one statement
+    student_query = db.session.query(Student.id, student_visibility(user)).filter(
+        Student.id.in_(student_ids), Student.deleted_at.is_(None)
+    )
+    if school_class_id is not None:
+        student_query = student_query.filter(Student.school_class_id == school_class_id)
+    visibility = dict(student_query.all())
+
+    # Existing results for this exam/subject are updated in place rather than duplicated
+    existing = {
+        student_id: (result_id, score) for student_id, result_id, score in
+        db.session.query(Result.student_id, Result.id, Result.score).filter(
+            Result.exam_id == exam.id, Result.subject_id == subject.id,
+            Result.student_id.in_(student_ids), Result.deleted_at.is_(None)
+        )
+    }
+
+    inserts, updates, errors, seen, row_index = [], [], [], set(), {}
+    added_scores, removed_scores = [], []
+    now = datetime.utcnow()
+    for index, (student_id, score, error) in enumerate(rows):
+        if error is not None:
+            errors.append({"index": index, "student_id": student_id, "message": error})
+        elif student_id in seen:
+            errors.append({"index": index, "student_id": student_id, "message": "Duplicate student on mark sheet"})
+        elif student_id not in visibility:
+            errors.append({"index": index, "student_id": student_id, "message": "Student not found"})
+        elif not visibility[student_id]:
+            errors.append({"index": index, "student_id": student_id, "message": "Unauthorized: Student not in your class"})
+        elif not (0 <= score <= 100):
+            errors.append({"index": index, "student_id": student_id, "message": f"Invalid score: {score} - Must be between 0 and 100"})
+        elif student_id in existing:
+            result_id, previous_score = existing[student_id]
+            # The result stays with the teacher who entered it; only the score changes
+            updates.append({"id": result_id, "score": score})
+            removed_scores.append((student_id, exam.id, subject.id, previous_score))
+            added_scores.append((student_id, exam.id, subject.id, score))
+        else:
+            row_index[student_id] = index
+            inserts.append({
+                "student_id": student_id, "exam_id": exam.id, "subject_id": subject.id,
+                "teacher_id": user.teacher_id, "score": score, "created_at": now, "deleted_at": None
+            })
+            added_scores.append((student_id, exam.id, subject.id, score))
+        if error is None:
+            seen.add(student_id)
+
+    if not inserts and not updates:
+        return jsonify({"message": "No valid results on mark sheet", "created": 0, "updated": 0, "errors": errors}), 400
+
+    try:
+        # Foreign keys and scope were validated above, so write with executemany
+        if inserts:
+            # A concurrent sheet may have recorded some of these since they were looked up; the
+            # unique index keeps its rows, and ours are reported instead of duplicated
+            statement = upsert(Result).on_conflict_do_nothing(
+                index_elements=['student_id', 'exam_id', 'subject_id'], index_where=Result.deleted_at.is_(None)
+            ).returning(Result.student_id)
+            inserted = set(db.session.scalars(statement, inserts))
+            if len(inserted) < len(inserts):
+                for row in inserts:
+                    if row["student_id"] not in inserted:
+                        errors.append({"index": row_index[row["student_id"]], "student_id": row["student_id"],
+                                       "message": "Result was recorded by another submission; resubmit to update it"})
+                errors.sort(key=lambda error: error["index"])
+                inserts = [row for row in inserts if row["student_id"] in inserted]
+                added_scores = [change for change in added_scores
+                                if change[0] in inserted or change[0] in existing]
+        if updates:
+            db.session.execute(update(Result), updates)
+        apply_result_changes(added=added_scores, removed=removed_scores)
+        bump_table_versions('results')
+        db.session.commit()
+        invalidate_exam_rankings(exam.id)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed to save mark sheet", "error": str(e)}), 500
+
+    return jsonify({"created": len(inserts), "updated": len(updates), "errors": errors}), 200
+
 @api_bp.route('/results', methods=['GET'])
 @jwt_required()
+@cached('results', 'students', 'school_classes', 'subjects', 'exams', 'teachers', 'users')
 def get_results():
     """Retrieve results (teacher or admin)."""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role not in ['teacher', 'admin']:
         return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
     
+    criteria = [Result.deleted_at.is_(None)]
     if user.role == 'teacher':
-        results = Result.query.filter_by(teacher_id=current_user_id, deleted_at=None).all()
-    else:  # admin
-        results = Result.query.filter(Result.deleted_at.is_(None)).all()
+        criteria.append(Result.teacher_id == current_user_id)
     
-    return jsonify(ResultSchema(many=True).dump(results))
+    schema = sparse_schema(ResultSchema)
+    flat = row_serializer(schema)
+    if flat:  # Serialize joined row tuples; no Result entities are built
+        query, dump = flat.statement.where(*criteria), flat.dump
+    else:
+        query, dump = sparse_query(Result.query.filter(*criteria), Result, schema), compiled(schema)
+    if wants_ndjson():  # Large exports: stream rows instead of building one JSON document
+        return ndjson_response(query.order_by(Result.id), dump)
+
+    results, next_cursor = paginate(query, Result.id)
+    return paginated_response([dump(result) for result in results], next_cursor)
 
 @api_bp.route('/results/<int:id>', methods=['GET'])
 @jwt_required()
 def get_result_by_id(id):
     """Retrieve a result (teacher or admin)."""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    result = Result.query.filter_by(id=id, deleted_at=None).first()
+    user = current_principal()
+    schema = sparse_schema(ResultSchema)
+    result = sparse_query(Result.query.filter_by(id=id, deleted_at=None), Result, schema).first()
     if not result:
         return jsonify({"message": "Result not found"}), 404
     if user.role == 'teacher' and result.teacher_id != current_user_id:
         return jsonify({"message": "Unauthorized: Not your result"}), 401
-    return jsonify(ResultSchema().dump(result))
+    return jsonify(compiled(schema)(result))
 
 @api_bp.route('/students/<int:student_id>/results', methods=['GET'])
 @jwt_required()
 def get_results_for_student(student_id):
     """Retrieve results for a student (parent, teacher, or admin)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    student = Student.query.filter_by(id=student_id, deleted_at=None).first()
+    user = current_principal()
+    student, visible = scoped_student(user, student_id)
     if not student:
         return jsonify({"message": "Student not found"}), 404
     
-    if user.role == 'parent' and student.parent_id != current_user_id:
-        return jsonify({"message": "Unauthorized: Not your student"}), 401
-    elif user.role == 'teacher':
-        classes = SchoolClass.query.filter_by(class_teacher_id=current_user_id, deleted_at=None).all()
-        class_ids = [cls.id for cls in classes]
-        if student.school_class_id not in class_ids:
-            return jsonify({"message": "Unauthorized: Not in your class"}), 401
+    if not visible:
+        message = "Unauthorized: Not your student" if user.role == 'parent' else "Unauthorized: Not in your class"
+        return jsonify({"message": message}), 401
     
     form = request.args.get('form')
     term = request.args.get('term')
     if not form or not term:
         return jsonify({"message": "Form and term parameters are required"}), 400
 
-    results = student.results
-    filtered_results = [
-        r for r in results
-        if r.exam and form.lower() in r.exam.form.name.lower() and r.exam.term and term.lower() in r.exam.term.lower()
-    ]
+    # One statement: the exam subquery is served by idx_exam_form_lower_term on (form_id, lower(term)),
+    # then the student's results are read by exam id
+    form_ids = select(Form.id).where(func.lower(Form.name) == form.strip().lower())
+    exam_ids = select(Exam.id).where(Exam.form_id.in_(form_ids), func.lower(Exam.term) == term.strip().lower())
+    rows = (
+        db.session.query(
+            Result.id, Result.student_id, Result.subject_id, Subject.name, Subject.deleted_at,
+            Result.exam_id, Exam.name, Exam.deleted_at, Result.score, Result.created_at
+        )
+        .join(Exam, Exam.id == Result.exam_id)
+        .outerjoin(Subject, Subject.id == Result.subject_id)
+        .filter(Result.student_id == student.id, Result.exam_id.in_(exam_ids), Result.deleted_at.is_(None))
+        .order_by(Result.id)
+        .all()
+    )
 
     results_data = [
         {
-            "id": result.id,
-            "student_id": result.student_id,
-            "subject_id": result.subject_id,
-            "subject_name": result.subject.name if result.subject and not is_soft_deleted(result.subject) else "N/A",
-            "exam_id": result.exam_id,
-            "exam_name": result.exam.name if result.exam and not is_soft_deleted(result.exam) else "N/A",
-            "score": result.score,
-            "created_at": result.created_at.isoformat()
+            "id": result_id,
+            "student_id": result_student_id,
+            "subject_id": subject_id,
+            "subject_name": subject_name if subject_name is not None and subject_deleted_at is None else "N/A",
+            "exam_id": exam_id,
+            "exam_name": exam_name if exam_deleted_at is None else "N/A",
+            "score": score,
+            "created_at": created_at.isoformat()
         }
-        for result in filtered_results if not is_soft_deleted(result)
+        for (result_id, result_student_id, subject_id, subject_name, subject_deleted_at,
+             exam_id, exam_name, exam_deleted_at, score, created_at) in rows
     ]
     return jsonify(results_data), 200
 
@@ -911,7 +1246,7 @@ def get_results_for_student(student_id):
 def update_result(id):
     """Update a result (teacher only)."""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'teacher':
         return jsonify({"message": "Unauthorized: Teacher access required"}), 401
     result = Result.query.filter_by(id=id, teacher_id=current_user_id, deleted_at=None).first()
@@ -921,13 +1256,23 @@ def update_result(id):
     if not data:
         return jsonify({"message": "No data provided"}), 400
     try:
+        previous = (result.student_id, result.exam_id, result.subject_id, result.score)
         result.score = data.get('score', result.score)
         result.student_id = data.get('student_id', result.student_id)
         result.subject_id = data.get('subject_id', result.subject_id)
         result.exam_id = data.get('exam_id', result.exam_id)
         result.teacher_id = data.get('teacher_id', result.teacher_id)
+        apply_result_changes(
+            added=[(result.student_id, result.exam_id, result.subject_id, result.score)],
+            removed=[previous]
+        )
+        bump_table_versions('results')
         db.session.commit()
+        invalidate_exam_rankings(previous[1], result.exam_id)
         return jsonify(ResultSchema().dump(result))
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "Another result already exists for this student, exam and subject"}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to update result", "error": str(e)}), 500
@@ -937,7 +1282,7 @@ def update_result(id):
 def delete_result(id):
     """Soft-delete a result (teacher only)."""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'teacher':
         return jsonify({"message": "Unauthorized: Teacher access required"}), 401
     result = Result.query.filter_by(id=id, teacher_id=current_user_id, deleted_at=None).first()
@@ -945,7 +1290,10 @@ def delete_result(id):
         return jsonify({"message": "Result not found or not authorized"}), 404
     try:
         result.deleted_at = datetime.utcnow()
+        apply_result_changes(removed=[(result.student_id, result.exam_id, result.subject_id, result.score)])
+        bump_table_versions('results')
         db.session.commit()
+        invalidate_exam_rankings(result.exam_id)
         return jsonify({"message": "Result soft-deleted successfully"})
     except Exception as e:
         db.session.rollback()
@@ -957,8 +1305,7 @@ def delete_result(id):
 @jwt_required()
 def create_welfare_report():
     """Create a welfare report (teacher or admin)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role not in ['teacher', 'admin']:
         return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
     data = request.get_json()
@@ -968,16 +1315,13 @@ def create_welfare_report():
     if data['category'] not in ['Discipline', 'Health', 'Academic']:
         return jsonify({"message": "Invalid category"}), 400
     try:
-        student = Student.query.filter_by(id=data['student_id'], deleted_at=None).first()
+        student, visible = scoped_student(user, data['student_id'])
         if not student:
             return jsonify({"message": "Student not found"}), 404
         
-        # Only check class assignment for teachers, not admins
-        if user.role == 'teacher':
-            classes = SchoolClass.query.filter_by(class_teacher_id=current_user_id, deleted_at=None).all()
-            class_ids = [cls.id for cls in classes]
-            if student.school_class_id not in class_ids:
-                return jsonify({"message": "Unauthorized: Student not in your class"}), 401
+        # Teachers only see students in their classes; admins see everyone
+        if not visible:
+            return jsonify({"message": "Unauthorized: Student not in your class"}), 401
         
         new_report = WelfareReport(
             student_id=data['student_id'],
@@ -988,6 +1332,7 @@ def create_welfare_report():
             deleted_at=None
         )
         db.session.add(new_report)
+        bump_table_versions('welfare_reports')
         db.session.commit()
         return jsonify(WelfareReportSchema().dump(new_report)), 201
     except Exception as e:
@@ -996,50 +1341,49 @@ def create_welfare_report():
 
 @api_bp.route('/welfare_reports', methods=['GET'])
 @jwt_required()
+@cached('welfare_reports', 'students', 'school_classes')
 def get_welfare_reports():
     """Retrieve welfare reports (teacher or admin)."""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role not in ['teacher', 'admin']:
         return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
     
     if user.role == 'teacher':
-        reports = WelfareReport.query.filter_by(created_by=current_user_id, deleted_at=None).all()
+        query = WelfareReport.query.filter_by(created_by=current_user_id, deleted_at=None)
     else:  # admin
-        reports = WelfareReport.query.filter(WelfareReport.deleted_at.is_(None)).all()
+        query = WelfareReport.query.filter(WelfareReport.deleted_at.is_(None))
     
-    return jsonify(WelfareReportSchema(many=True).dump(reports))
+    schema = sparse_schema(WelfareReportSchema, many=True)
+    reports, next_cursor = paginate(sparse_query(query, WelfareReport, schema), WelfareReport.id)
+    return paginated_response(compiled(schema)(reports), next_cursor)
 
 @api_bp.route('/welfare_reports/<int:id>', methods=['GET'])
 @jwt_required()
 def get_welfare_report_by_id(id):
     """Retrieve a welfare report (teacher or admin)."""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    report = WelfareReport.query.filter_by(id=id, deleted_at=None).first()
+    user = current_principal()
+    schema = sparse_schema(WelfareReportSchema)
+    report = sparse_query(WelfareReport.query.filter_by(id=id, deleted_at=None), WelfareReport, schema).first()
     if not report:
         return jsonify({"message": "Welfare Report not found"}), 404
     if user.role == 'teacher' and report.created_by != current_user_id:
         return jsonify({"message": "Unauthorized: Not your report"}), 401
-    return jsonify(WelfareReportSchema().dump(report))
+    return jsonify(compiled(schema)(report))
 
 @api_bp.route('/students/<int:student_id>/welfare_reports', methods=['GET'])
 @jwt_required()
 def get_welfare_reports_for_student(student_id):
     """Retrieve welfare reports for a student (parent, teacher, or admin)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    student = Student.query.filter_by(id=student_id, deleted_at=None).first()
+    user = current_principal()
+    student, visible = scoped_student(user, student_id)
     if not student:
         return jsonify({"message": "Student not found"}), 404
     
-    if user.role == 'parent' and student.parent_id != current_user_id:
-        return jsonify({"message": "Unauthorized: Not your student"}), 401
-    elif user.role == 'teacher':
-        classes = SchoolClass.query.filter_by(class_teacher_id=current_user_id, deleted_at=None).all()
-        class_ids = [cls.id for cls in classes]
-        if student.school_class_id not in class_ids:
-            return jsonify({"message": "Unauthorized: Not in your class"}), 401
+    if not visible:
+        message = "Unauthorized: Not your student" if user.role == 'parent' else "Unauthorized: Not in your class"
+        return jsonify({"message": message}), 401
     
     category = request.args.get('category')
     query = WelfareReport.query.filter_by(student_id=student_id, deleted_at=None)
@@ -1067,7 +1411,7 @@ def get_welfare_reports_for_student(student_id):
 def update_welfare_report(id):
     """Update a welfare report (teacher only)."""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'teacher':
         return jsonify({"message": "Unauthorized: Teacher access required"}), 401
     report = WelfareReport.query.filter_by(id=id, created_by=current_user_id, deleted_at=None).first()
@@ -1084,6 +1428,7 @@ def update_welfare_report(id):
                 return jsonify({"message": "Invalid category"}), 400
             report.category = data['category']
         report.updated_at = datetime.utcnow()
+        bump_table_versions('welfare_reports')
         db.session.commit()
         return jsonify(WelfareReportSchema().dump(report))
     except Exception as e:
@@ -1095,7 +1440,7 @@ def update_welfare_report(id):
 def delete_welfare_report(id):
     """Soft-delete a welfare report (teacher only)."""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'teacher':
         return jsonify({"message": "Unauthorized: Teacher access required"}), 401
     report = WelfareReport.query.filter_by(id=id, created_by=current_user_id, deleted_at=None).first()
@@ -1103,6 +1448,7 @@ def delete_welfare_report(id):
         return jsonify({"message": "Welfare Report not found or not authorized"}), 404
     try:
         report.deleted_at = datetime.utcnow()
+        bump_table_versions('welfare_reports')
         db.session.commit()
         return jsonify({"message": "Welfare Report soft-deleted successfully"})
     except Exception as e:
@@ -1113,42 +1459,32 @@ def delete_welfare_report(id):
 
 @api_bp.route('/teachers', methods=['GET'])
 @jwt_required()
+@cached('teachers', 'users', 'school_classes', 'subjects')
 def get_teachers():
     """Retrieve teachers (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
-    teachers = User.query.filter_by(role='teacher', deleted_at=None).options(joinedload(User.teacher).joinedload(Teacher.subjects)).all()
-    teacher_data = [
-        {
-            "id": teacher.id,
-            "username": teacher.username,
-            "email": teacher.email,
-            "subjects": [subject.name for subject in teacher.teacher.subjects if not is_soft_deleted(subject)] if teacher.teacher else [],
-            "managed_class": {"id": cls.id, "name": cls.name} if (cls := SchoolClass.query.filter_by(class_teacher_id=teacher.id, deleted_at=None).first()) else None
-        }
-        for teacher in teachers
-    ]
-    return jsonify(teacher_data)
+    if current_app.config['TEACHER_DIRECTORY_CACHE']:
+        return paginated_response(*teacher_directory_page(*page_args()))
+    teachers, next_cursor = paginate(teacher_query(), User.id)
+    return paginated_response(teacher_directory_rows(teachers), next_cursor)
 
 #get teacher id for teacher exams page
 @api_bp.route('/me/teacher', methods=['GET'])
 @jwt_required()
 def get_current_teacher():
     """Retrieve the authenticated teacher's profile (teacher only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'teacher':
         return jsonify({"message": "Unauthorized: Teacher access required"}), 401
 
-    teacher = Teacher.query.filter_by(user_id=current_user_id, deleted_at=None).first()
-    if not teacher:
+    if not user.teacher_id:
         return jsonify({"message": "Teacher profile not found"}), 404
 
     teacher_data = {
-        "id": teacher.id,
-        "user_id": teacher.user_id,
+        "id": user.teacher_id,
+        "user_id": user.id,
         "username": user.username,
         "email": user.email,
         # Add more fields if needed, e.g., subjects or classes
@@ -1159,29 +1495,28 @@ def get_current_teacher():
 @jwt_required()
 def get_teacher_by_id(id):
     """Retrieve a teacher (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
-    teacher = User.query.filter_by(id=id, role='teacher', deleted_at=None).first()
+    schema = sparse_schema(UserSchema)
+    teacher = sparse_query(User.query.filter_by(id=id, role='teacher', deleted_at=None), User, schema).first()
     if teacher:
-        return jsonify(UserSchema().dump(teacher))
+        return jsonify(compiled(schema)(teacher))
     return jsonify({"message": "Teacher not found"}), 404
 
 @api_bp.route('/teachers', methods=['POST'])
 @jwt_required()
 def create_teacher():
     """Create a teacher (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     data = request.get_json()
     required_fields = ['username', 'email', 'password']
     if not data or any(field not in data for field in required_fields):
         return jsonify({"message": "Missing required fields"}), 400
+    hashed_password = hash_password(data['password'])  # outside the try: a busy hashing pool answers 503
     try:
-        hashed_password = bcrypt.generate_password_hash(data['password']).decode('utf-8')
         new_user = User(username=data['username'], email=data['email'], password=hashed_password, role='teacher', deleted_at=None)
         db.session.add(new_user)
         db.session.commit()
@@ -1194,7 +1529,9 @@ def create_teacher():
                 if subject:
                     teacher_subject = TeacherSubject(teacher_id=new_teacher.id, subject_id=subject.id, deleted_at=None)
                     db.session.add(teacher_subject)
+        bump_table_versions('teachers', 'users')
         db.session.commit()
+        invalidate_teacher_directory()
         return jsonify(UserSchema().dump(new_user)), 201
     except Exception as e:
         db.session.rollback()
@@ -1204,8 +1541,7 @@ def create_teacher():
 @jwt_required()
 def update_teacher(id):
     """Update a teacher (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     teacher = User.query.filter_by(id=id, role='teacher', deleted_at=None).first()
@@ -1214,11 +1550,13 @@ def update_teacher(id):
     data = request.get_json()
     if not data:
         return jsonify({"message": "No data provided"}), 400
+    # Hashed outside the try: a busy hashing pool answers 503
+    hashed_password = hash_password(data['password']) if 'password' in data else None
     try:
         teacher.username = data.get('username', teacher.username)
         teacher.email = data.get('email', teacher.email)
-        if 'password' in data:
-            teacher.password = bcrypt.generate_password_hash(data['password']).decode('utf-8')
+        if hashed_password is not None:
+            teacher.password = hashed_password
         if 'subjects' in data:
             TeacherSubject.query.filter_by(teacher_id=teacher.teacher.id, deleted_at=None).delete()
             subjects = data['subjects'] if isinstance(data['subjects'], list) else data['subjects'].split(",")
@@ -1227,7 +1565,10 @@ def update_teacher(id):
                 if subject:
                     teacher_subject = TeacherSubject(teacher_id=teacher.teacher.id, subject_id=subject.id, deleted_at=None)
                     db.session.add(teacher_subject)
+        bump_table_versions('teachers', 'users')
         db.session.commit()
+        invalidate_principal(teacher.id)
+        invalidate_teacher_directory()
         return jsonify(UserSchema().dump(teacher))
     except Exception as e:
         db.session.rollback()
@@ -1237,8 +1578,7 @@ def update_teacher(id):
 @jwt_required()
 def delete_teacher(id):
     """Soft-delete a teacher (admin only)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role != 'admin':
         return jsonify({"message": "Unauthorized: Admin access required"}), 401
     teacher = User.query.filter_by(id=id, role='teacher', deleted_at=None).first()
@@ -1248,7 +1588,11 @@ def delete_teacher(id):
         if teacher.teacher:
             teacher.teacher.deleted_at = datetime.utcnow()
         teacher.deleted_at = datetime.utcnow()
+        bump_token_version(teacher.id)
+        bump_table_versions('teachers', 'users')
         db.session.commit()
+        invalidate_principal(teacher.id)
+        invalidate_teacher_directory()
         return jsonify({"message": "Teacher soft-deleted successfully"})
     except Exception as e:
         db.session.rollback()
@@ -1258,11 +1602,152 @@ def delete_teacher(id):
 
 @api_bp.route('/forms', methods=['GET'])
 @jwt_required()
+@conditional('forms')
+@cached('forms')
 def get_forms():
     """Retrieve forms (teacher or admin)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_principal()
     if not user or user.role not in ['teacher', 'admin']:
         return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
     forms = Form.query.filter(Form.deleted_at.is_(None)).all()
-    return jsonify([{"id": f.id, "name": f.name} for f in forms])
\ No newline at end of file
+    return jsonify([{"id": f.id, "name": f.name} for f in forms])
+
+# --- Report Card Routes ---
+
+@api_bp.route('/report_cards', methods=['POST'])
+@jwt_required()
+def create_report_cards():
+    """Start a background job rendering report cards for a form and term into one zip (admin only)."""
+    user = current_principal()
+    if not user or user.role != 'admin':
+        return jsonify({"message": "Unauthorized: Admin access required"}), 401
+    data = request.get_json()
+    if not data or not data.get('form_id') or not data.get('term'):
+        return jsonify({"message": "form_id and term are required"}), 400
+    fmt = data.get('format', 'html')
+    if fmt not in REPORT_CARD_FORMATS:
+        return jsonify({"message": f"Invalid format: must be one of {', '.join(REPORT_CARD_FORMATS)}"}), 400
+    if not Form.query.filter_by(id=data['form_id'], deleted_at=None).first():
+        return jsonify({"message": "Form not found"}), 404
+    job = submit_job('report_cards', user.id, generate_report_cards, data['form_id'], data['term'], fmt)
+    return jsonify(job_summary(job)), 202
+
+# --- Export Routes ---
+
+@api_bp.route('/exports/results', methods=['GET'])
+@jwt_required()
+def export_results():
+    """Stream results as CSV or Parquet, filtered by form_id, term, exam_id and school_class_id (admin only)."""
+    user = current_principal()
+    if not user or user.role != 'admin':
+        return jsonify({"message": "Unauthorized: Admin access required"}), 401
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"message": f"Invalid format: must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        return results_export_response(export_filters(request.args), fmt)
+    except ExportError as e:
+        return jsonify({"message": str(e)}), 400
+
+@api_bp.route('/exports/results', methods=['POST'])
+@jwt_required()
+def create_results_export():
+    """Start a background job writing a results export to disk (admin only)."""
+    user = current_principal()
+    if not user or user.role != 'admin':
+        return jsonify({"message": "Unauthorized: Admin access required"}), 401
+    data = request.get_json(silent=True) or {}
+    fmt = data.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"message": f"Invalid format: must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        filters = export_filters(data)
+        if fmt == 'parquet':
+            require_parquet()
+    except ExportError as e:
+        return jsonify({"message": str(e)}), 400
+    job = submit_job('results_export', user.id, export_results_job, filters, fmt)
+    return jsonify(job_summary(job)), 202
+
+@api_bp.route('/exports/gradebook', methods=['GET'])
+@jwt_required()
+def export_gradebook():
+    """Stream an exam's gradebook as CSV: one row per student, one column per subject (teacher or admin)."""
+    user = current_principal()
+    if not user or user.role not in ['teacher', 'admin']:
+        return jsonify({"message": "Unauthorized: Teacher or Admin access required"}), 401
+    exam = Exam.query.filter_by(id=request.args.get('exam_id', type=int), deleted_at=None).first()
+    if not exam:
+        return jsonify({"message": "Exam not found"}), 404
+    school_class_ids = None if user.role == 'admin' else set(user.class_ids)  # Teachers export their own classes
+    return Response(
+        stream_with_context(gradebook_chunks(exam, school_class_ids)), mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename=gradebook-exam{exam.id}.csv'}
+    )
+
+# --- Job Routes ---
+
+def _owned_job(job_id, user):
+    """Look up a job visible to the caller: its owner, or any admin."""
+    job = get_job(job_id)
+    if not job or (user.role != 'admin' and job['owner_id'] != user.id):
+        return None
+    return job
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job_status(job_id):
+    """Retrieve the status and progress of a background job (owner or admin)."""
+    user = current_principal()
+    job = _owned_job(job_id, user) if user else None
+    if not job:
+        return jsonify({"message": "Job not found"}), 404
+    return jsonify(job_summary(job)), 200
+
+@api_bp.route('/jobs/<job_id>/download', methods=['GET'])
+@jwt_required()
+def download_job_output(job_id):
+    """Download the file produced by a finished background job (owner or admin)."""
+    user = current_principal()
+    job = _owned_job(job_id, user) if user else None
+    if not job:
+        return jsonify({"message": "Job not found"}), 404
+    if job['status'] != 'done':
+        return jsonify({"message": f"Job is {job['status']}"}), 409
+    if not job['path'] or not os.path.exists(job['path']):
+        return jsonify({"message": "Job output is no longer available"}), 410
+    return send_file(job['path'], as_attachment=True, download_name=os.path.basename(job['path'])[len(job['id']) + 1:])
+
+# --- Cache Routes ---
+
+@api_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Retrieve response cache hit/miss/eviction counters for this worker (admin only)."""
+    user = current_principal()
+    if not user or user.role != 'admin':
+        return jsonify({"message": "Unauthorized: Admin access required"}), 401
+    return jsonify(cache_stats()), 200
+
+@api_bp.route('/cache', methods=['DELETE'])
+@jwt_required()
+def clear_cache():
+    """Drop every cached response (admin only)."""
+    user = current_principal()
+    if not user or user.role != 'admin':
+        return jsonify({"message": "Unauthorized: Admin access required"}), 401
+    backend = cache_backend()
+    if backend is not None:
+        backend.clear()
+    return jsonify({"message": "Cache cleared"}), 200
+
+# --- Database Routes ---
+
+@api_bp.route('/db/pool', methods=['GET'])
+@jwt_required()
+def get_pool_status():
+    """Retrieve connection pool occupancy and checkout wait times for this worker (admin only)."""
+    user = current_principal()
+    if not user or user.role != 'admin':
+        return jsonify({"message": "Unauthorized: Admin access required"}), 401
+    return jsonify(pool_status(db.engine)), 200
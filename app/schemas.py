@@ -9,6 +9,7 @@ class UserSchema(SQLAlchemyAutoSchema):
         load_instance = True
         include_relationships = True
         include_fk = True
+        exclude = ('token_version',)
 
     teacher = fields.Nested('TeacherSchema', dump_only=True, only=['id'])  # Limit to prevent recursion
     students = fields.Nested('StudentSchema', many=True, dump_only=True, only=['name'])  # Limit to student names
@@ -0,0 +1,35 @@
+# app/scopes.py
+from sqlalchemy import exists, true
+from app import db
+from app.models import Student, SchoolClass
+
+def student_visibility(principal):
+    """SQL predicate that is true when the principal may see a Student row."""
+    if principal.role == 'parent':
+        return Student.parent_id == principal.id
+    if principal.role == 'teacher':
+        return exists().where(
+            SchoolClass.id == Student.school_class_id,
+            SchoolClass.class_teacher_id == principal.id,
+            SchoolClass.deleted_at.is_(None),
+        )
+    return true()
+
+def visible_students(principal):
+    """Query of live students restricted to the principal's visibility rules."""
+    return Student.query.filter(Student.deleted_at.is_(None), student_visibility(principal))
+
+def scoped_student(principal, student_id):
+    """Fetch a live student and whether the principal may see it, in a single statement.
+
+    Returns (None, False) when the student does not exist, so callers can still
+    tell "not found" apart from "not in your scope".
+    """
+    row = (
+        db.session.query(Student, student_visibility(principal).label('visible'))
+        .filter(Student.id == student_id, Student.deleted_at.is_(None))
+        .first()
+    )
+    if row is None:
+        return None, False
+    return row[0], bool(row[1])
@@ -0,0 +1,214 @@
+# app/serializers.py
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+from flask.json.provider import DefaultJSONProvider
+from marshmallow import fields
+from marshmallow_sqlalchemy.fields import Related, RelatedList
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import MANYTOONE, aliased
+from app.timing import timed
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
+
+# Field types whose dumped value is the attribute itself; datetimes are left to the JSON provider
+_PASSTHROUGH = {fields.Integer, fields.String, fields.Boolean, fields.DateTime, fields.Date}
+
+# A Core select producing one row per object, and the function turning such a row into a dict
+RowSerializer = namedtuple('RowSerializer', ['statement', 'dump'])
+
+def _signature(schema):
+    only = frozenset(schema.only) if schema.only is not None else None
+    return type(schema), only, frozenset(schema.exclude)
+
+def _value(field, expression):
+    """Python expression dumping a plain (non-relationship) field, or None if it needs marshmallow."""
+    if type(field) in _PASSTHROUGH:
+        return expression
+    if type(field) is fields.Float:
+        return f"(None if (v := {expression}) is None else float(v))"
+    return None
+
+def _compile_object(schema, model, env):
+    """Generate a function into env dumping one model instance the way schema.dump would; returns its name."""
+    mapper = inspect(model)
+    name = f"_dump_{len(env)}"
+    env[name] = None  # reserve the name before compiling nested schemas
+    items = []
+    for key, field in schema.dump_fields.items():
+        attribute = field.attribute or key
+        out = repr(field.data_key or key)
+        if not hasattr(model, attribute):
+            continue  # marshmallow skips attributes the object does not have
+        expression = f"obj.{attribute}"
+        if isinstance(field, fields.Nested) and attribute in mapper.relationships:
+            target = mapper.relationships[attribute].mapper.class_
+            nested = _compile_object(field.schema, target, env)
+            if field.many:
+                items.append(f"{out}: [{nested}(o) for o in {expression}]")
+            else:
+                items.append(f"{out}: None if (v := {expression}) is None else {nested}(v)")
+        elif isinstance(field, RelatedList):
+            key_name = inspect(mapper.relationships[attribute].mapper.class_).primary_key[0].key
+            items.append(f"{out}: [o.{key_name} for o in {expression}]")
+        elif isinstance(field, Related):
+            key_name = inspect(mapper.relationships[attribute].mapper.class_).primary_key[0].key
+            items.append(f"{out}: None if (v := {expression}) is None else v.{key_name}")
+        else:
+            value = _value(field, expression)
+            if value is None:
+                field_name = f"_field_{len(env)}"
+                env[field_name] = field
+                value = f"{field_name}.serialize({attribute!r}, obj)"
+            items.append(f"{out}: {value}")
+    source = f"def {name}(obj):\n    return {{{', '.join(items)}}}\n"
+    exec(source, env)
+    return name
+
+@lru_cache(maxsize=256)
+def _object_serializer(schema_cls, only, exclude):
+    env = {}
+    name = _compile_object(schema_cls(only=only, exclude=exclude), schema_cls.Meta.model, env)
+    return env[name]
+
+def compiled(schema):
+    """A flat dump function equivalent to schema.dump for this schema's fields.
+
+    Functions are generated once per schema class and field selection, so the
+    per-object cost is attribute reads instead of marshmallow's field dispatch.
+    Datetimes are returned as-is for the JSON provider to encode.
+    """
+    dump = _object_serializer(*_signature(schema))
+    if schema.many:
+        def dump_many(objs):
+            with timed('serialize'):
+                return [dump(obj) for obj in objs]
+        return dump_many
+
+    def dump_one(obj):
+        with timed('serialize'):
+            return dump(obj)
+    return dump_one
+
+def _row_columns(schema, model):
+    """(output key, field, (join, nested plan) or None, selected columns) per field, or None if a field needs the ORM."""
+    mapper = inspect(model)
+    plan = []
+    for key, field in schema.dump_fields.items():
+        attribute = field.attribute or key
+        out = field.data_key or key
+        if not hasattr(model, attribute):
+            continue
+        if attribute in mapper.columns:
+            if _value(field, 'v') is None:
+                return None
+            plan.append((out, field, None, [mapper.columns[attribute]]))
+            continue
+        relationship = mapper.relationships.get(attribute)
+        if relationship is None or relationship.direction is not MANYTOONE:
+            return None  # collections and one-to-one back references would multiply rows
+        if isinstance(field, Related):
+            (local, remote), = relationship.local_remote_pairs
+            plan.append((out, field, None, [local]))
+        elif isinstance(field, fields.Nested) and not field.many:
+            target = aliased(relationship.mapper.class_)
+            nested = _row_columns(field.schema, relationship.mapper.class_)
+            if nested is None or any(_value(sub_field, 'v') is None for _, sub_field, _, _ in nested):
+                return None  # only one level of plain columns under a many-to-one is flattened
+            key_column = getattr(target, inspect(relationship.mapper.class_).primary_key[0].key)
+            columns = [key_column] + [getattr(target, column.key) for _, _, _, (column,) in nested]
+            plan.append((out, field, (getattr(model, attribute).of_type(target), nested), columns))
+        else:
+            return None
+    return plan
+
+@lru_cache(maxsize=256)
+def _row_serializer(schema_cls, only, exclude):
+    model = schema_cls.Meta.model
+    plan = _row_columns(schema_cls(only=only, exclude=exclude), model)
+    if plan is None:
+        return None
+    env, items, columns, joins = {}, [], [], []
+    for out, field, nested, selected in plan:
+        start = len(columns)
+        columns.extend(column.label(f"c{start + i}") for i, column in enumerate(selected))
+        if nested is None:
+            items.append(f"{out!r}: {_value(field, f'row[{start}]') or f'row[{start}]'}")
+            continue
+        join, sub_plan = nested
+        joins.append(join)
+        sub_items = ', '.join(
+            f"{sub_out!r}: {_value(sub_field, f'row[{start + 1 + i}]')}"
+            for i, (sub_out, sub_field, _, _) in enumerate(sub_plan)
+        )
+        items.append(f"{out!r}: None if row[{start}] is None else {{{sub_items}}}")
+    # Keyset pagination reads the primary key by name, so always select it
+    key_column = inspect(model).primary_key[0]
+    columns.append(key_column.label(key_column.key))
+    stmt = select(*columns).select_from(model)
+    for join in joins:
+        stmt = stmt.outerjoin(join)
+    exec(f"def dump(row):\n    return {{{', '.join(items)}}}\n", env)
+    return RowSerializer(stmt, env['dump'])
+
+def row_serializer(schema):
+    """A Core select and row dump function equivalent to loading and dumping objects with schema.
+
+    Many-to-one nested fields become outer joins, so no ORM entities are built.
+    Returns None when the selected fields include collections or deeper
+    nesting; callers then load objects and use compiled().
+    """
+    return _row_serializer(*_signature(schema))
+
+def precompile_serializers(*schema_classes):
+    """Generate the default (collection-free) serializers up front instead of on the first request."""
+    from app.fieldsets import schema_fields
+    for schema_cls in schema_classes:
+        schema = schema_cls(exclude=tuple(schema_fields(schema_cls)[1]))
+        compiled(schema)
+        row_serializer(schema)
+
+def _default(o):
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Encode responses with orjson when it is installed.
+
+    Datetimes and dates are written as ISO 8601 by both encoders, so compiled
+    serializers can hand them over without formatting them first.
+    """
+
+    default = staticmethod(_default)
+
+    def _options(self, sort_keys, indent):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        option = self._options(kwargs.get('sort_keys', self.sort_keys), kwargs.get('indent'))
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        with timed('serialize'):
+            if orjson is None:
+                return super().response(*args, **kwargs)
+            obj = self._prepare_response_obj(args, kwargs)
+            indent = (self.compact is None and self._app.debug) or self.compact is False
+            body = orjson.dumps(obj, default=self.default, option=self._options(self.sort_keys, indent))
+            return self._app.response_class(body + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,42 @@
+# app/sqlite.py
+from sqlalchemy import event
+
+# PRAGMAs run once on every new SQLite connection, by SQLITE_PROFILE
+SQLITE_PROFILES = {
+    # Only what the app relies on: enforce foreign keys
+    'default': {'foreign_keys': 'ON'},
+    # Edge installs where write contention is the bottleneck: WAL lets readers run alongside the
+    # writer, NORMAL sync is crash-safe under WAL, and the busy timeout queues writers instead of failing
+    'sqlite-performance': {
+        'foreign_keys': 'ON',
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+    },
+}
+
+def sqlite_pragmas(config):
+    """The PRAGMA name -> value mapping for the configured profile."""
+    profile = config['SQLITE_PROFILE']
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE: {profile}. Must be one of {sorted(SQLITE_PROFILES)}")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    if profile == 'sqlite-performance':
+        pragmas['mmap_size'] = config['SQLITE_MMAP_SIZE']
+        pragmas['cache_size'] = -config['SQLITE_CACHE_SIZE_KB']  # negative values are KiB rather than pages
+        pragmas['busy_timeout'] = config['SQLITE_BUSY_TIMEOUT_MS']
+    return pragmas
+
+def register_sqlite_pragmas(engine, pragmas):
+    """Apply pragmas when the engine opens a connection instead of on every request."""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
@@ -0,0 +1,161 @@
+# app/stats.py
+from datetime import datetime
+from sqlalchemy import case, func, insert, literal, or_, select
+from app import db
+from app.dialects import upsert
+from app.models import ExamStat, Result, Student
+import click
+
+def _group_filter(exam_id, subject_id, school_class_id):
+    return (
+        ExamStat.exam_id == exam_id,
+        ExamStat.subject_id == subject_id,
+        ExamStat.school_class_id == school_class_id,
+    )
+
+def _refresh_extremes(exam_id, subject_id, school_class_id):
+    """Recompute min/max for one (exam, subject, class) group after a score left it."""
+    count, low, high = (
+        db.session.query(func.count(Result.id), func.min(Result.score), func.max(Result.score))
+        .join(Student, Student.id == Result.student_id)
+        .filter(
+            Result.exam_id == exam_id, Result.subject_id == subject_id,
+            Student.school_class_id == school_class_id, Result.deleted_at.is_(None), Student.deleted_at.is_(None)
+        )
+        .one()
+    )
+    stats = ExamStat.query.filter(*_group_filter(exam_id, subject_id, school_class_id))
+    if not count:
+        stats.delete(synchronize_session=False)
+    else:
+        stats.update({ExamStat.min_score: low, ExamStat.max_score: high}, synchronize_session=False)
+
+def apply_result_changes(added=(), removed=()):
+    """Fold result writes into exam_stats inside the caller's transaction.
+
+    added and removed are iterables of (student_id, exam_id, subject_id, score).
+    A student being soft-deleted passes all of their results as removed.
+    Counts and totals are applied as SQL deltas and min/max widen in SQL on
+    insert; only groups that lost a score have their extremes recomputed.
+    """
+    added, removed = list(added), list(removed)
+    if not added and not removed:
+        return
+    db.session.flush()  # recomputed extremes must see the caller's pending writes
+
+    student_ids = {change[0] for change in added + removed}
+    class_ids = dict(db.session.query(Student.id, Student.school_class_id).filter(Student.id.in_(student_ids)))
+
+    groups = {}
+    for sign, changes in ((1, added), (-1, removed)):
+        for student_id, exam_id, subject_id, score in changes:
+            school_class_id = class_ids.get(student_id)
+            if school_class_id is None:
+                continue
+            group = groups.setdefault((exam_id, subject_id, school_class_id), {
+                "count": 0, "total": 0.0, "min": None, "max": None, "removed": False
+            })
+            group["count"] += sign
+            group["total"] += sign * score
+            if sign > 0:
+                group["min"] = score if group["min"] is None else min(group["min"], score)
+                group["max"] = score if group["max"] is None else max(group["max"], score)
+            else:
+                group["removed"] = True
+
+    now = datetime.utcnow()
+    for (exam_id, subject_id, school_class_id), group in groups.items():
+        values = {
+            ExamStat.result_count: ExamStat.result_count + group["count"],
+            ExamStat.score_total: ExamStat.score_total + group["total"],
+            ExamStat.updated_at: now,
+        }
+        if group["min"] is not None:
+            values[ExamStat.min_score] = case(
+                (or_(ExamStat.min_score.is_(None), ExamStat.min_score > group["min"]), group["min"]),
+                else_=ExamStat.min_score,
+            )
+            values[ExamStat.max_score] = case(
+                (or_(ExamStat.max_score.is_(None), ExamStat.max_score < group["max"]), group["max"]),
+                else_=ExamStat.max_score,
+            )
+        if group["count"] > 0:
+            # One statement either way, so concurrent first writes to a group cannot both insert it
+            statement = upsert(ExamStat).values(
+                exam_id=exam_id, subject_id=subject_id, school_class_id=school_class_id,
+                result_count=group["count"], score_total=group["total"],
+                min_score=group["min"], max_score=group["max"], updated_at=now,
+            )
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=['exam_id', 'subject_id', 'school_class_id'], set_=values,
+            ))
+        else:
+            ExamStat.query.filter(*_group_filter(exam_id, subject_id, school_class_id)).update(
+                values, synchronize_session=False
+            )
+        if group["removed"]:
+            _refresh_extremes(exam_id, subject_id, school_class_id)
+
+def exam_stat_rows(exam_id):
+    """All stored aggregates for an exam, one row per (subject, class)."""
+    return ExamStat.query.filter_by(exam_id=exam_id).order_by(ExamStat.subject_id, ExamStat.school_class_id).all()
+
+_STAT_COLUMNS = ['exam_id', 'subject_id', 'school_class_id', 'result_count', 'score_total', 'min_score', 'max_score', 'updated_at']
+
+def _aggregate(*criteria):
+    """exam_stats rows computed from live results of live students, grouped by each student's current class."""
+    return (
+        select(
+            Result.exam_id, Result.subject_id, Student.school_class_id,
+            func.count(Result.id), func.sum(Result.score), func.min(Result.score), func.max(Result.score),
+            literal(datetime.utcnow()),
+        )
+        .join(Student, Student.id == Result.student_id)
+        .where(Result.deleted_at.is_(None), Student.deleted_at.is_(None), Student.school_class_id.isnot(None), *criteria)
+        .group_by(Result.exam_id, Result.subject_id, Student.school_class_id)
+    )
+
+def move_student_stats(student_ids, previous_class_ids):
+    """Re-home exam_stats after students changed class, inside the caller's transaction.
+
+    Aggregates are keyed by each student's current class, so every group of
+    the classes the students left (previous_class_ids) or joined is rebuilt
+    for the exams they have results in. The rebuilt rows carry a new
+    updated_at, which changes the rankings fingerprint of those exams.
+    """
+    student_ids = list(student_ids)
+    if not student_ids:
+        return
+    db.session.flush()  # the rebuild must see the caller's new class assignments
+    current_class_ids = {
+        class_id for class_id, in
+        db.session.query(Student.school_class_id).filter(Student.id.in_(student_ids))
+    }
+    class_ids = (set(previous_class_ids) | current_class_ids) - {None}
+    if not class_ids:
+        return
+    exam_ids = select(Result.exam_id).where(Result.student_id.in_(student_ids), Result.deleted_at.is_(None)).distinct()
+    ExamStat.query.filter(
+        ExamStat.exam_id.in_(exam_ids), ExamStat.school_class_id.in_(class_ids)
+    ).delete(synchronize_session=False)
+    db.session.execute(insert(ExamStat).from_select(
+        _STAT_COLUMNS, _aggregate(Result.exam_id.in_(exam_ids), Student.school_class_id.in_(class_ids)),
+    ))
+
+def rebuild_exam_stats(exam_id=None):
+    """Resynchronize exam_stats from the results table (all exams, or one)."""
+    stale = ExamStat.query
+    criteria = ()
+    if exam_id is not None:
+        stale = stale.filter(ExamStat.exam_id == exam_id)
+        criteria = (Result.exam_id == exam_id,)
+    stale.delete(synchronize_session=False)
+    db.session.execute(insert(ExamStat).from_select(_STAT_COLUMNS, _aggregate(*criteria)))
+    db.session.commit()
+
+@click.command('rebuild-exam-stats')
+@click.option('--exam-id', type=int, default=None, help='Only rebuild statistics for this exam.')
+def rebuild_exam_stats_command(exam_id):
+    """Recompute the exam_stats table from results."""
+    rebuild_exam_stats(exam_id)
+    click.echo(f"Exam statistics rebuilt for {'exam ' + str(exam_id) if exam_id else 'all exams'}")
@@ -0,0 +1,32 @@
+# app/streaming.py
+from flask import Response, request, current_app, stream_with_context
+from sqlalchemy import Select
+from app import db
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+def wants_ndjson():
+    """True when the client asked for a streamed export via Accept or ?stream=1."""
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+def ndjson_response(query, dump):
+    """Stream an ORM query or Core select as newline-delimited JSON, one dumped row per line.
+
+    Rows are pulled through a server-side cursor in STREAM_BATCH_SIZE batches; the
+    session's identity map only holds weak references, so rows already written are
+    released and memory stays bounded however many rows match.
+    """
+    batch_size = current_app.config['STREAM_BATCH_SIZE']
+
+    def generate():
+        if isinstance(query, Select):
+            rows = db.session.execute(query, execution_options={'yield_per': batch_size})
+        else:
+            rows = query.yield_per(batch_size).execution_options(stream_results=True)
+        encode = current_app.json.dumps
+        for row in rows:
+            yield encode(dump(row)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
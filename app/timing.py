@@ -0,0 +1,144 @@
+# app/timing.py
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from app import db
+import cProfile
+import heapq
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# Statement text kept per statement in the slow-request log
+_STATEMENT_CHARS = 500
+
+def _timing():
+    """This request's counters, or None outside a request or with REQUEST_TIMING off."""
+    return g.get('timing') if has_request_context() else None
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to this request's `name` Server-Timing metric."""
+    timing = _timing()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing[name] = timing.get(name, 0.0) + time.perf_counter() - start
+
+def register_sql_timing(engine):
+    """Count statements and accumulate their time on the request that issued them."""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_statement(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._timing_start = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _end_statement(conn, cursor, statement, parameters, context, executemany):
+        timing = _timing()
+        if timing is None or context is None:
+            return
+        elapsed = time.perf_counter() - context._timing_start
+        timing['db'] += elapsed
+        timing['statements'] += 1
+        # Min-heap of the slowest statements so far, capped at SLOW_REQUEST_STATEMENTS
+        entry = (elapsed, timing['statements'], statement)
+        if len(timing['slowest']) < timing['keep']:
+            heapq.heappush(timing['slowest'], entry)
+        elif timing['keep']:
+            heapq.heappushpop(timing['slowest'], entry)
+
+def _profile_requested(config):
+    token = config['PROFILE_TOKEN']
+    if token and request.headers.get('X-Profile') == token:
+        return True
+    rate = config['PROFILE_SAMPLE_RATE']
+    return rate > 0 and random.random() < rate
+
+def _start_profiler():
+    try:
+        from pyinstrument import Profiler  # optional: sampling profiler, cProfile otherwise
+    except ImportError:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return None  # another request on this process is already being profiled
+        return profiler
+    profiler = Profiler(async_mode='disabled')
+    profiler.start()
+    return profiler
+
+def _save_profile(profiler):
+    path = current_app.config['PROFILE_DIR'] or os.path.join(current_app.instance_path, 'profiles')
+    os.makedirs(path, exist_ok=True)
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{g.get('request_id', os.getpid())}"
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        filename = os.path.join(path, f"{name}.prof")
+        profiler.dump_stats(filename)  # read with python -m pstats
+    else:
+        profiler.stop()
+        filename = os.path.join(path, f"{name}.html")
+        with open(filename, 'w') as out:
+            out.write(profiler.output_html())
+    return filename
+
+def server_timing(timing, total):
+    """Server-Timing header value: SQL statements and time, serialization and the whole handler."""
+    count = timing['statements']
+    metrics = [f'db;desc="{count} statement{"" if count == 1 else "s"}";dur={timing["db"] * 1000:.2f}']
+    if 'serialize' in timing:
+        metrics.append(f'serialize;dur={timing["serialize"] * 1000:.2f}')
+    metrics.append(f'app;dur={total * 1000:.2f}')
+    return ', '.join(metrics)
+
+def init_request_timing(app):
+    """Time every request and report it as Server-Timing; log slow requests and profile selected ones.
+
+    Call inside an app context (the engine's events are registered here).
+    """
+    if not app.config['REQUEST_TIMING']:
+        return
+    register_sql_timing(db.engine)
+
+    @app.before_request
+    def start_timing():
+        g.timing = {'start': time.perf_counter(), 'db': 0.0, 'statements': 0, 'slowest': [],
+                    'keep': app.config['SLOW_REQUEST_STATEMENTS']}
+        if _profile_requested(app.config):
+            g.profiler = _start_profiler()
+
+    @app.after_request
+    def report_timing(response):
+        timing = g.pop('timing', None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing['start']
+        response.headers['Server-Timing'] = server_timing(timing, total)
+
+        threshold = app.config['SLOW_REQUEST_MS']
+        if threshold and total * 1000 >= threshold:
+            logger.warning(
+                "Slow request %s %s: %.1f ms, %d statements in %.1f ms",
+                request.method, request.full_path.rstrip('?'), total * 1000, timing['statements'], timing['db'] * 1000,
+                extra={"slowest_statements": [
+                    {"ms": round(elapsed * 1000, 2), "statement": statement[:_STATEMENT_CHARS]}
+                    for elapsed, _, statement in sorted(timing['slowest'], reverse=True)
+                ]},
+            )
+        return response
+
+    @app.teardown_request
+    def stop_profiler(exc):
+        # Teardown runs even when the response failed, so a profiler is never left running on the thread
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            logger.info("Profiled %s %s: %s", request.method, request.full_path.rstrip('?'), _save_profile(profiler))
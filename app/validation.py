@@ -0,0 +1,47 @@
+# app/validation.py
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+import itertools
+
+# model class -> {fk attribute: referenced model}
+_foreign_key_checks = {}
+
+def register_foreign_key_checks(model, **targets):
+    """Declare foreign-key attributes of a model to be validated when the session flushes."""
+    _foreign_key_checks.setdefault(model, {}).update(targets)
+
+def _pending_references(session):
+    """Collect referenced ids per target model across every new or modified object."""
+    pending = {}
+    for obj in itertools.chain(session.new, session.dirty):
+        checks = _foreign_key_checks.get(type(obj))
+        if not checks:
+            continue
+        state = inspect(obj)
+        for attr, target in checks.items():
+            if state.persistent and not state.attrs[attr].history.added:
+                continue  # unchanged on an already-validated row
+            value = getattr(obj, attr)
+            if value is not None:
+                pending.setdefault(target, {}).setdefault(value, attr)
+    return pending
+
+@event.listens_for(Session, 'before_flush')
+def validate_foreign_keys(session, flush_context, instances):
+    """Check every pending foreign key with one IN query per referenced table.
+
+    Rows already in the session's identity map are trusted without a query.
+    """
+    for target, references in _pending_references(session).items():
+        missing = {
+            value for value in references
+            if session.identity_map.get(identity_key(target, value)) is None
+        }
+        if missing:
+            with session.no_autoflush:
+                found = {row[0] for row in session.query(target.id).filter(target.id.in_(missing))}
+            missing -= found
+        if missing:
+            value = sorted(missing, key=str)[0]
+            raise ValueError(f"Invalid {references[value]}: {value} - No matching {target.__tablename__} row exists")
@@ -0,0 +1,95 @@
+# app/versions.py
+from functools import wraps
+from flask import current_app, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.auth import current_principal
+from app.cache import invalidate_cache_tags
+from app.dialects import upsert
+from app.fieldsets import requested_tables
+from app.models import TableVersion
+import hashlib
+import json
+import threading
+import time
+
+# Per-worker copy of table_versions, reloaded every REFERENCE_VERSION_TTL seconds
+# and immediately after this worker commits a bump.
+_versions = {}
+_loaded_at = None
+_versions_lock = threading.Lock()
+
+# Written on every mark entry: a shared counter row would serialize those writes, so bumping
+# them only invalidates cached responses and conditional() GETs that read them carry no ETag
+UNVERSIONED_TABLES = frozenset({'results'})
+
+def bump_table_versions(*names):
+    """Advance the change counters of tables written in the current transaction."""
+    versioned = sorted(set(names) - UNVERSIONED_TABLES)
+    if versioned:
+        statement = upsert(TableVersion).values([{"name": name, "version": 1} for name in versioned])
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['name'], set_={TableVersion.version: TableVersion.version + 1},
+        ))
+    db.session.info.setdefault('table_versions_bumped', set()).update(names)
+
+@event.listens_for(Session, 'after_commit')
+def _reload_after_bump(session):
+    """Once bumps are committed, refresh this worker's counters and drop cached responses tagged with those tables."""
+    global _loaded_at
+    bumped = session.info.pop('table_versions_bumped', None)
+    if bumped:
+        if bumped - UNVERSIONED_TABLES:
+            with _versions_lock:
+                _loaded_at = None
+        invalidate_cache_tags(*sorted(bumped))
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_bump(session):
+    session.info.pop('table_versions_bumped', None)
+
+def table_versions(names):
+    """Current counters for the given tables, from the per-worker copy while it is fresh."""
+    global _versions, _loaded_at
+    now = time.monotonic()
+    with _versions_lock:
+        if _loaded_at is not None and now - _loaded_at < current_app.config['REFERENCE_VERSION_TTL']:
+            return tuple(_versions.get(name, 0) for name in names)
+    loaded = dict(db.session.query(TableVersion.name, TableVersion.version))
+    with _versions_lock:
+        _versions, _loaded_at = loaded, now
+    return tuple(loaded.get(name, 0) for name in names)
+
+def _etag(principal, tables):
+    # Scope is part of the tag: a teacher's class list differs from an admin's
+    key = [request.path, sorted(request.args.items(multi=True)), principal.role, principal.id, table_versions(tables)]
+    return hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()
+
+def conditional(*tables, include=None):
+    """Serve a GET with a strong ETag derived from the versions of the tables its body reads.
+
+    include maps ?include= collections to the extra tables they read. A
+    matching If-None-Match gets a 304 before the view runs; only successful
+    responses are tagged, and responses reading an unversioned table are not.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            principal = current_principal()
+            read = requested_tables(tables, include)
+            if not principal or UNVERSIONED_TABLES.intersection(read):
+                return view(*args, **kwargs)
+            etag = _etag(principal, read)
+            cache_control = f"private, max-age={current_app.config['REFERENCE_CACHE_MAX_AGE']}, must-revalidate"
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
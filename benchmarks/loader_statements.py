@@ -0,0 +1,83 @@
+"""Check that endpoints using the named loader profiles issue a fixed number of SQL statements.
+
+Each endpoint is requested for a small and a large result set, and the
+statement count is read from the Server-Timing header, which the
+before_cursor_execute timing hook in app/timing.py fills in. An N+1
+regression makes the count grow with the rows returned and fails the check.
+
+The target database is cleared and re-seeded with seed_data.py, so point
+--database at a scratch database (the default is a temporary SQLite file).
+
+Usage: python benchmarks/loader_statements.py [--database postgresql://...]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+# Statements per request: one principal lookup plus the loader profile's own (see app/loaders.py);
+# /classes also reads table_versions for its ETag
+EXPECTED = {
+    'students.list': 1 + 3,
+    'students.by_parent': 1 + 2,
+    'classes.list': 1 + 1 + 1,
+}
+
+def statement_count(response):
+    match = re.search(r'db;desc="(\d+) statements?"', response.headers.get('Server-Timing', ''))
+    return int(match.group(1)) if match else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', help='SQLAlchemy URL of a scratch database')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'loader_statements.db')}"
+    # Every request loads its principal and table versions and nothing is served from a cache, so counts are exact
+    os.environ.update(PRINCIPAL_CACHE_TTL='0', REFERENCE_VERSION_TTL='0', RESPONSE_CACHE='none',
+                      REQUEST_TIMING='true', JWT_EMBED_CLAIMS='false')
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    import seed_data
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import func
+    from app import db
+    from app.models import SchoolClass, Student, User
+
+    seed_data.seed_data()
+    app = seed_data.app
+    with app.app_context():
+        admin = User.query.filter_by(role='admin').first().id
+        teacher = (db.session.query(SchoolClass.class_teacher_id)
+                   .filter(SchoolClass.class_teacher_id.isnot(None), SchoolClass.deleted_at.is_(None)).first()[0])
+        parents = (db.session.query(Student.parent_id, func.count())
+                   .filter(Student.deleted_at.is_(None), Student.parent_id.isnot(None))
+                   .group_by(Student.parent_id).order_by(func.count()).all())
+        tokens = {user_id: create_access_token(identity=user_id) for user_id in {admin, teacher, parents[0][0], parents[-1][0]}}
+
+    # (profile, small request, large request) as (user id, url)
+    cases = [
+        ('students.list', (admin, '/api/students?limit=1'), (admin, '/api/students?limit=200')),
+        ('students.by_parent', (parents[0][0], f'/api/parents/{parents[0][0]}/students'),
+         (parents[-1][0], f'/api/parents/{parents[-1][0]}/students')),
+        ('classes.list', (teacher, '/api/classes'), (admin, '/api/classes')),
+    ]
+    client = app.test_client()
+    failed = False
+    for profile, *requests in cases:
+        counts = []
+        for user_id, url in requests:
+            response = client.get(url, headers={'Authorization': f'Bearer {tokens[user_id]}'})
+            counts.append((len(response.get_json()), statement_count(response), response.status_code))
+        ok = all(status == 200 and count == EXPECTED[profile] for _, count, status in counts)
+        failed |= not ok
+        detail = ', '.join(f"{rows} rows: {count} statements" for rows, count, _ in counts)
+        print(f"  {'ok  ' if ok else 'FAIL'} {profile:20s} expected {EXPECTED[profile]}; {detail}")
+
+    if failed:
+        print("FAIL: statement counts differ from the loader profiles")
+        sys.exit(1)
+    print("OK: statement counts are fixed")
+
+if __name__ == '__main__':
+    main()
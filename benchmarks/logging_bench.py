@@ -0,0 +1,103 @@
+"""Time log calls on request threads: synchronous stderr writes against the queued JSON pipeline.
+
+Records go to a file standing in for stderr; --write-latency-us makes every
+write block for that long, like a pipe to a log collector that has fallen
+behind. Times are what the calling thread pays per record; the queued
+pipeline's writer thread drains in the background and is flushed before the
+next case starts.
+
+Usage: python benchmarks/logging_bench.py [--threads 8] [--records 20000] [--write-latency-us 50]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from flask import Flask
+from app import log
+
+class SlowStream:
+    """A file whose writes block (releasing the GIL, like a full pipe) for a fixed time."""
+
+    def __init__(self, stream, latency):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+def timed(threads, records, emit):
+    """Seconds per call, averaged over every thread's calls."""
+    start_line = threading.Barrier(threads)
+    elapsed = []
+
+    def worker(n):
+        start_line.wait()
+        started = time.perf_counter()
+        for i in range(records):
+            emit(n, i)
+        elapsed.append(time.perf_counter() - started)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return sum(elapsed) / (threads * records)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--write-latency-us', type=float, default=50.0)
+    args = parser.parse_args()
+
+    output = open(os.path.join(tempfile.mkdtemp(), 'stderr.log'), 'w')
+    sink = SlowStream(output, args.write_latency_us / 1e6)
+    root = logging.getLogger()
+    logger = logging.getLogger('app.bench')
+    payload = {"name": "End term", "form_name": "Form 3", "term": "Term 2", "date": "2024-11-04T08:00:00.000Z"}
+    timings = {}
+
+    # What logging.basicConfig(level=DEBUG) did: format and write on the calling thread, one lock for all threads
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG)
+    timings['sync stderr, debug on'] = timed(args.threads, args.records,
+                                             lambda n, i: logger.debug(f"Received data for creating exam: {payload}"))
+    root.removeHandler(handler)
+
+    app = Flask(__name__)
+    app.config.update(LOG_LEVEL='DEBUG', LOG_FORMAT='json', LOG_DEBUG_SAMPLE_RATE=1.0)
+    log.configure_logging(app)
+    log._listener.handlers[0].setStream(sink)
+    timings['queued JSON, info'] = timed(args.threads, args.records,
+                                         lambda n, i: logger.info("Exam %s created for form %s", i, payload['form_name']))
+    log._stop_listener()
+
+    app.config.update(LOG_LEVEL='INFO')
+    log.configure_logging(app)
+    log._listener.handlers[0].setStream(sink)
+    timings['debug off, f-string'] = timed(args.threads, args.records,
+                                           lambda n, i: logger.debug(f"Received data for creating exam: {payload}"))
+    timings['debug off, %-args'] = timed(args.threads, args.records,
+                                         lambda n, i: logger.debug("Exam rejected: form %r not found", payload['form_name']))
+    log._stop_listener()
+    output.close()
+
+    print(f"{args.threads} threads x {args.records} records, {args.write_latency_us:.0f} us per write, cost on the calling thread")
+    for name, per_call in timings.items():
+        print(f"  {name:22s}: {per_call * 1e6:8.2f} us/record")
+
+if __name__ == '__main__':
+    main()
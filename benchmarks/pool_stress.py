@@ -0,0 +1,100 @@
+"""Drive concurrent API reads through one worker's connection pool and check it never runs dry.
+
+The target database is cleared and re-seeded with seed_data.py, so point
+--database at a scratch database (the default is a temporary SQLite file).
+
+Usage: python benchmarks/pool_stress.py [--threads 16] [--seconds 10] [--database postgresql://...]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', '16')), help='concurrent request threads')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--database', help='SQLAlchemy URL of a scratch database')
+    args = parser.parse_args()
+
+    # Config reads the environment at import time, so size the pool for this run first
+    os.environ['DATABASE_URL'] = args.database or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pool_stress.db')}"
+    os.environ['WEB_THREADS'] = str(args.threads)
+    os.environ.setdefault('WEB_CONCURRENCY', '1')
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    import seed_data
+    from flask_jwt_extended import create_access_token
+    from app import db
+    from app.models import Exam, User
+    from app.pool import pool_stats, pool_status
+
+    seed_data.seed_data()
+    app = seed_data.app
+    with app.app_context():
+        token = create_access_token(identity=User.query.filter_by(role='admin').first().id)
+        exam_id = Exam.query.first().id
+        options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    pool_stats.reset()
+
+    urls = ['/api/results?limit=50', '/api/subjects', '/api/exams', '/api/students?limit=50',
+            f'/api/exams/{exam_id}/stats', f'/api/exams/{exam_id}/rankings', '/api/classes', '/api/users?limit=20']
+    latencies, failures = [], {}
+    lock = threading.Lock()
+    start_line = threading.Barrier(args.threads)
+
+    def worker(offset):
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+        local, errors = [], {}
+        start_line.wait()
+        deadline = time.perf_counter() + args.seconds
+        i = offset
+        while time.perf_counter() < deadline:
+            url = urls[i % len(urls)]
+            i += 1
+            started = time.perf_counter()
+            status = client.get(url, headers=headers).status_code
+            local.append(time.perf_counter() - started)
+            if status != 200:
+                errors[(url, status)] = errors.get((url, status), 0) + 1
+        with lock:
+            latencies.extend(local)
+            for key, count in errors.items():
+                failures[key] = failures.get(key, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        status = pool_status(db.engine)
+        backend = db.engine.url.get_backend_name()
+
+    print(f"{args.threads} threads for {args.seconds:.0f}s against {backend}: "
+          f"pool_size={options.get('pool_size')} max_overflow={options.get('max_overflow')} pool_timeout={options.get('pool_timeout')}")
+    print(f"  requests      : {len(latencies)} ({len(latencies) / args.seconds:.0f}/s)")
+    print(f"  latency ms    : p50 {percentile(latencies, 0.5) * 1000:.1f}  p95 {percentile(latencies, 0.95) * 1000:.1f}  "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f}")
+    print(f"  checkout wait : avg {status.get('wait_ms_avg')} ms  max {status.get('wait_ms_max')} ms  "
+          f"slow {status.get('slow_checkouts')}")
+    print(f"  connections   : peak {status.get('peak_checked_out')} checked out, {status.get('connects')} opened, "
+          f"{status.get('timeouts')} timeouts")
+    for (url, code), count in sorted(failures.items()):
+        print(f"  failed        : {count} x {code} {url}")
+
+    exhausted = status.get('timeouts', 0) > 0
+    if exhausted or failures:
+        print("FAIL: pool exhausted" if exhausted else "FAIL: non-200 responses")
+        sys.exit(1)
+    print("OK: no pool exhaustion")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/rankings_bench.py
+"""Time the vectorized ranking engine against a per-student Python loop.
+
+Usage: python benchmarks/rankings_bench.py [--students 10000] [--subjects 11] [--classes 200]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.rankings import compute_rankings
+
+def synthetic_exam(students, subjects, classes, seed=0):
+    """Result columns for a form where every student sat every subject."""
+    rng = np.random.default_rng(seed)
+    student_col = np.repeat(np.arange(1, students + 1), subjects)
+    class_col = np.repeat(rng.integers(1, classes + 1, students), subjects)
+    subject_col = np.tile(np.arange(1, subjects + 1), students)
+    scores = rng.integers(0, 101, students * subjects).astype(np.float64)
+    return student_col, class_col, subject_col, scores
+
+def python_rankings(student_col, class_col, subject_col, scores):
+    """Reference implementation: the dict-and-sort approach the ORM code would take."""
+    totals, classes = {}, {}
+    for student_id, class_id, score in zip(student_col.tolist(), class_col.tolist(), scores.tolist()):
+        totals[student_id] = totals.get(student_id, 0.0) + score
+        classes[student_id] = class_id
+    form_order = sorted(set(totals.values()), reverse=True)
+    form_rank = {total: position for position, total in enumerate(form_order, 1)}
+    class_rank = {}
+    for class_id in set(classes.values()):
+        members = sorted({totals[s] for s in totals if classes[s] == class_id}, reverse=True)
+        class_rank[class_id] = {total: position for position, total in enumerate(members, 1)}
+    return {
+        student_id: (form_rank[total], class_rank[classes[student_id]][total])
+        for student_id, total in totals.items()
+    }
+
+def best_of(repeat, fn, *args):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--subjects', type=int, default=11)
+    parser.add_argument('--classes', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    columns = synthetic_exam(args.students, args.subjects, args.classes)
+    vectorized, ranking = best_of(args.repeat, compute_rankings, *columns)
+    looped, reference = best_of(max(1, args.repeat // 2), python_rankings, *columns)
+
+    for i, student_id in enumerate(ranking.student_ids.tolist()):
+        assert reference[student_id] == (ranking.form_positions[i], ranking.class_positions[i]), student_id
+
+    print(f"{args.students} students x {args.subjects} subjects ({len(columns[0])} results, {args.classes} classes)")
+    print(f"  numpy engine : {vectorized * 1000:8.1f} ms")
+    print(f"  python loop  : {looped * 1000:8.1f} ms  (class/form positions only)")
+    print(f"  speed-up     : {looped / vectorized:8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Per-endpoint SQL statement counts and time split from the Server-Timing header, and the cost of collecting it.
+
+The target database is cleared and re-seeded with seed_data.py, so point
+--database at a scratch database (the default is a temporary SQLite file).
+
+Usage: python benchmarks/request_timing.py [--repeat 20] [--database postgresql://...]
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+METRIC = re.compile(r'(\w+);(?:desc="(\d+) statements?";)?dur=([\d.]+)')
+
+def parse_server_timing(header):
+    """{metric: ms} plus 'statements' from a Server-Timing header."""
+    values = {}
+    for name, statements, duration in METRIC.findall(header or ''):
+        values[name] = float(duration)
+        if statements:
+            values['statements'] = int(statements)
+    return values
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='requests per endpoint')
+    parser.add_argument('--database', help='SQLAlchemy URL of a scratch database')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'request_timing.db')}"
+    os.environ['SLOW_REQUEST_MS'] = '0'
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    import seed_data
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from app.config import Config
+    from app.models import Exam, Student, Subject, User
+
+    seed_data.seed_data()
+    app = seed_data.app
+    with app.app_context():
+        token = create_access_token(identity=User.query.filter_by(role='admin').first().id)
+        exam_id, student_id, subject_id = Exam.query.first().id, Student.query.first().id, Subject.query.first().id
+    headers = {'Authorization': f'Bearer {token}'}
+    urls = ['/api/users?limit=50', '/api/students?limit=50', f'/api/students/{student_id}', '/api/subjects',
+            f'/api/subjects/{subject_id}', '/api/exams', '/api/results?limit=50', '/api/results?limit=50&fields=id,score',
+            '/api/welfare_reports?limit=50', '/api/classes', '/api/forms', f'/api/exams/{exam_id}/stats',
+            f'/api/exams/{exam_id}/rankings']
+
+    client = app.test_client()
+    print(f"{'endpoint':45s} {'status':>6s} {'stmts':>5s} {'db ms':>7s} {'ser ms':>7s} {'app ms':>7s}")
+    for url in urls:
+        samples = []
+        for _ in range(args.repeat):
+            response = client.get(url, headers=headers)
+            samples.append(parse_server_timing(response.headers.get('Server-Timing')))
+        median = {key: statistics.median(sample.get(key, 0.0) for sample in samples) for key in ('db', 'serialize', 'app')}
+        print(f"{url:45s} {response.status_code:6d} {samples[-1].get('statements', 0):5d} "
+              f"{median['db']:7.2f} {median['serialize']:7.2f} {median['app']:7.2f}")
+
+    # The same requests through an app without the instrumentation
+    Config.REQUEST_TIMING = False
+    bare = create_app().test_client()
+    elapsed = {'timing on': 0.0, 'timing off': 0.0}
+    for _ in range(args.repeat):
+        for label, target in (('timing on', client), ('timing off', bare)):
+            start = time.perf_counter()
+            for url in urls:
+                target.get(url, headers=headers)
+            elapsed[label] += time.perf_counter() - start
+    for label, seconds in elapsed.items():
+        print(f"{label:10s}: {seconds / (args.repeat * len(urls)) * 1000:6.2f} ms/request")
+
+if __name__ == '__main__':
+    main()
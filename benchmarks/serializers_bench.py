@@ -0,0 +1,114 @@
+"""Compare marshmallow, compiled and row-tuple serialization of the /results payload.
+
+Usage: python benchmarks/serializers_bench.py [--results 100000] [--students 2000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# An in-memory database, created from the models, for the synthetic school
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sqlalchemy import insert
+from app import create_app, db
+from app.fieldsets import sparse_query
+from app.models import Exam, Form, Result, SchoolClass, Student, Subject, Teacher, User
+from app.schemas import ResultSchema
+from app.serializers import compiled, row_serializer
+
+app = create_app()
+
+def seed(results, students, subjects=11, exams=6, seed=0):
+    """Synthetic school with `results` live results spread over students, subjects and exams."""
+    rng = random.Random(seed)
+    now = datetime(2024, 1, 1)
+    db.session.execute(insert(Form), [{"id": 1, "name": "Form 1"}])
+    db.session.execute(insert(User), [
+        {"id": 1, "username": "parent", "email": "parent@example.com", "password": "x", "role": "parent"},
+        {"id": 2, "username": "teacher", "email": "teacher@example.com", "password": "x", "role": "teacher"},
+    ])
+    db.session.execute(insert(Teacher), [{"id": 1, "user_id": 2}])
+    db.session.execute(insert(SchoolClass), [{"id": 1, "name": "Form 1 East", "form_id": 1, "class_teacher_id": 2}])
+    db.session.execute(insert(Subject), [{"id": i, "name": f"Subject {i}"} for i in range(1, subjects + 1)])
+    db.session.execute(insert(Exam), [
+        {"id": i, "name": f"Exam {i}", "term": "Term 1", "form_id": 1, "date": now, "created_at": now} for i in range(1, exams + 1)
+    ])
+    db.session.execute(insert(Student), [
+        {"id": i, "name": f"Student {i}", "admission_number": f"ADM{i:06d}", "school_class_id": 1, "parent_id": 1}
+        for i in range(1, students + 1)
+    ])
+    db.session.execute(insert(Result), [
+        {"student_id": rng.randint(1, students), "subject_id": rng.randint(1, subjects), "exam_id": rng.randint(1, exams),
+         "teacher_id": 1, "score": rng.uniform(0, 100), "created_at": now + timedelta(seconds=i)}
+        for i in range(results)
+    ])
+    db.session.commit()
+
+def marshmallow_payload(schema):
+    """The path /results took before: load entities, dump with marshmallow, encode with the stdlib."""
+    results = sparse_query(Result.query.filter(Result.deleted_at.is_(None)), Result, schema).order_by(Result.id).all()
+    return json.dumps(schema.dump(results), sort_keys=True, separators=(',', ':'))
+
+def compiled_payload(schema):
+    """Same entities, dumped by the generated function and encoded by the app's JSON provider."""
+    results = sparse_query(Result.query.filter(Result.deleted_at.is_(None)), Result, schema).order_by(Result.id).all()
+    return app.json.dumps(compiled(schema)(results))
+
+def row_payload(schema):
+    """No entities: a joined Core select whose row tuples are dumped directly."""
+    flat = row_serializer(schema)
+    rows = db.session.execute(flat.statement.where(Result.deleted_at.is_(None)).order_by(Result.id))
+    return app.json.dumps([flat.dump(row) for row in rows])
+
+def best_of(repeat, fn, *args, fresh_session=True):
+    timings, result = [], None
+    for _ in range(repeat):
+        if fresh_session:
+            db.session.expunge_all()
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--results', type=int, default=100000)
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        seed(args.results, args.students)
+        schema = ResultSchema(many=True)  # no nested collections, so this is also the ?fields=-less shape
+        timings = {}
+        payloads = {}
+        for name, fn in (('marshmallow', marshmallow_payload), ('compiled', compiled_payload), ('row tuples', row_payload)):
+            timings[name], payloads[name] = best_of(args.repeat, fn, schema)
+
+        # Serialization alone, on entities that are already loaded
+        results = sparse_query(Result.query, Result, schema).order_by(Result.id).all()
+        dump_only = {
+            'marshmallow': best_of(args.repeat, lambda: json.dumps(schema.dump(results), sort_keys=True, separators=(',', ':')), fresh_session=False)[0],
+            'compiled': best_of(args.repeat, lambda: app.json.dumps(compiled(schema)(results)), fresh_session=False)[0],
+        }
+
+    reference = json.loads(payloads['marshmallow'])
+    for name in ('compiled', 'row tuples'):
+        assert json.loads(payloads[name]) == reference, name
+
+    print(f"{args.results} results ({len(payloads['marshmallow']) / 1e6:.1f} MB of JSON), best of {args.repeat}")
+    for name, elapsed in timings.items():
+        speed_up = timings['marshmallow'] / elapsed
+        print(f"  {name:12s}: {elapsed * 1000:8.1f} ms  {args.results / elapsed:10.0f} rows/s  {speed_up:5.1f}x")
+    print("dump + encode only (entities already loaded)")
+    for name, elapsed in dump_only.items():
+        speed_up = dump_only['marshmallow'] / elapsed
+        print(f"  {name:12s}: {elapsed * 1000:8.1f} ms  {args.results / elapsed:10.0f} rows/s  {speed_up:5.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Concurrent read/write throughput of each SQLITE_PROFILE on a copy of the SQLite database.
+
+The database (instance/edutech.db by default) is copied to a temporary
+directory for every profile, so the original is never written.
+
+Usage: python benchmarks/sqlite_bench.py [--database instance/edutech.db] [--readers 8] [--writers 2] [--seconds 5]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+from sqlalchemy import create_engine, exc, text
+from app.config import Config
+from app.sqlite import SQLITE_PROFILES, register_sqlite_pragmas, sqlite_pragmas
+
+READ = text(
+    "SELECT results.id, results.score, students.name FROM results "
+    "JOIN students ON students.id = results.student_id "
+    "WHERE results.exam_id = :exam_id AND results.deleted_at IS NULL"
+)
+WRITE = text("UPDATE results SET score = :score WHERE id = :id")
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def run_profile(profile, source, readers, writers, seconds):
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, 'bench.db')
+    shutil.copy(source, path)
+    config = {name: getattr(Config, name) for name in dir(Config) if name.startswith('SQLITE_')}
+    config['SQLITE_PROFILE'] = profile
+    engine = create_engine(f"sqlite:///{path}", pool_size=readers + writers, max_overflow=0)
+    register_sqlite_pragmas(engine, sqlite_pragmas(config))
+
+    with engine.connect() as conn:
+        exam_ids = [row[0] for row in conn.execute(text("SELECT DISTINCT exam_id FROM results"))]
+        result_ids = [row[0] for row in conn.execute(text("SELECT id FROM results"))]
+    if not result_ids:
+        raise SystemExit(f"{source} has no results to read or update")
+
+    timings = {'read': [], 'write': []}
+    errors = {'read': 0, 'write': 0}
+    lock = threading.Lock()
+    start_line = threading.Barrier(readers + writers)
+
+    def worker(kind, seed):
+        rng = random.Random(seed)
+        local, failed = [], 0
+        with engine.connect() as conn:
+            start_line.wait()
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    if kind == 'read':
+                        conn.execute(READ, {"exam_id": rng.choice(exam_ids)}).fetchall()
+                        conn.rollback()
+                    else:
+                        # A mark-sheet style transaction: a handful of score updates committed together
+                        for result_id in rng.sample(result_ids, min(5, len(result_ids))):
+                            conn.execute(WRITE, {"score": rng.uniform(0, 100), "id": result_id})
+                        conn.commit()
+                except exc.OperationalError:
+                    conn.rollback()
+                    failed += 1
+                    continue
+                local.append(time.perf_counter() - started)
+        with lock:
+            timings[kind].extend(local)
+            errors[kind] += failed
+
+    threads = [threading.Thread(target=worker, args=('read', n)) for n in range(readers)]
+    threads += [threading.Thread(target=worker, args=('write', readers + n)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    shutil.rmtree(workdir, ignore_errors=True)
+    return timings, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default=os.path.join(ROOT, 'instance', 'edutech.db'))
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers + {args.writers} writers for {args.seconds:.0f}s on a copy of {args.database}")
+    for profile in SQLITE_PROFILES:
+        timings, errors = run_profile(profile, args.database, args.readers, args.writers, args.seconds)
+        print(f"  {profile}")
+        for kind in ('read', 'write'):
+            done = timings[kind]
+            print(f"    {kind:5s}: {len(done) / args.seconds:8.0f} ops/s  p50 {percentile(done, 0.5) * 1000:7.2f} ms  "
+                  f"p95 {percentile(done, 0.95) * 1000:7.2f} ms  {errors[kind]} locked")
+
+if __name__ == '__main__':
+    main()
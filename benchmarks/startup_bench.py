@@ -0,0 +1,53 @@
+"""Time a cold start: importing the app package, building an app and answering the first request.
+
+Every run is a fresh interpreter, so nothing is shared between runs but the
+operating system's file cache. Building an app never opens a database
+connection, so any DATABASE_URL works.
+
+Usage: python benchmarks/startup_bench.py [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs in the child interpreter; prints the phase timings in seconds as JSON
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+built = time.perf_counter()
+status = application.test_client().get('/health').status_code
+served = time.perf_counter()
+assert status == 200, status
+print(json.dumps({'import app': imported - start, 'create_app()': built - imported,
+                  'first /health': served - built, 'total': served - start}))
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    timings = {}
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        for phase, elapsed in json.loads(output.splitlines()[-1]).items():
+            timings.setdefault(phase, []).append(elapsed)
+
+    print(f"cold start over {args.runs} fresh interpreters")
+    for phase, values in timings.items():
+        print(f"  {phase:14s}: median {statistics.median(values) * 1000:7.1f} ms  "
+              f"min {min(values) * 1000:7.1f} ms  max {max(values) * 1000:7.1f} ms")
+
+if __name__ == '__main__':
+    main()
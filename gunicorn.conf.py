@@ -0,0 +1,13 @@
+# gunicorn.conf.py
+import os
+
+# Build the app once in the master; workers fork with the routes, schemas and compiled serializers already imported
+preload_app = True
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+threads = int(os.getenv("WEB_THREADS", "1"))
+
+def post_fork(server, worker):
+    # A forked worker must not reuse connections the master may have opened; start it on a fresh pool
+    from app import db
+    with worker.app.wsgi().app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,184 @@
+"""initial schema
+
+Revision ID: 3f1c2a9b7d10
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9b7d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by db.create_all() already have these tables; adopt them as-is
+    if sa.inspect(op.get_bind()).has_table('users'):
+        return
+    op.create_table('forms',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_forms_name'), 'forms', ['name'], unique=True)
+    op.create_table('subjects',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_subjects_name'), 'subjects', ['name'], unique=True)
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=80), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('password', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.String(length=50), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_role'), 'users', ['role'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_table('exams',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('term', sa.String(length=50), nullable=True),
+    sa.Column('form_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['form_id'], ['forms.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_exams_form_id'), 'exams', ['form_id'], unique=False)
+    op.create_table('school_classes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('form_id', sa.Integer(), nullable=False),
+    sa.Column('class_teacher_id', sa.Integer(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['class_teacher_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['form_id'], ['forms.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_school_classes_class_teacher_id'), 'school_classes', ['class_teacher_id'], unique=False)
+    op.create_index(op.f('ix_school_classes_form_id'), 'school_classes', ['form_id'], unique=False)
+    op.create_index(op.f('ix_school_classes_name'), 'school_classes', ['name'], unique=True)
+    op.create_table('teachers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_teachers_user_id'), 'teachers', ['user_id'], unique=False)
+    op.create_table('students',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('school_class_id', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('admission_number', sa.String(length=50), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['parent_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['school_class_id'], ['school_classes.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_students_admission_number'), 'students', ['admission_number'], unique=True)
+    op.create_index(op.f('ix_students_parent_id'), 'students', ['parent_id'], unique=False)
+    op.create_index(op.f('ix_students_school_class_id'), 'students', ['school_class_id'], unique=False)
+    op.create_table('teacher_subjects',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('teacher_id', sa.Integer(), nullable=False),
+    sa.Column('subject_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['subject_id'], ['subjects.id'], ),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teachers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_teacher_subject_subject_id', 'teacher_subjects', ['subject_id'], unique=False)
+    op.create_index('idx_teacher_subject_teacher_id', 'teacher_subjects', ['teacher_id'], unique=False)
+    op.create_table('results',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('exam_id', sa.Integer(), nullable=False),
+    sa.Column('subject_id', sa.Integer(), nullable=False),
+    sa.Column('teacher_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), server_default='0.0', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.ForeignKeyConstraint(['subject_id'], ['subjects.id'], ),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teachers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_results_exam_id'), 'results', ['exam_id'], unique=False)
+    op.create_index(op.f('ix_results_student_id'), 'results', ['student_id'], unique=False)
+    op.create_index(op.f('ix_results_subject_id'), 'results', ['subject_id'], unique=False)
+    op.create_index(op.f('ix_results_teacher_id'), 'results', ['teacher_id'], unique=False)
+    op.create_table('student_subjects',
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('subject_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.ForeignKeyConstraint(['subject_id'], ['subjects.id'], ),
+    sa.PrimaryKeyConstraint('student_id', 'subject_id')
+    )
+    op.create_index('idx_student_subject_student_id', 'student_subjects', ['student_id'], unique=False)
+    op.create_index('idx_student_subject_subject_id', 'student_subjects', ['subject_id'], unique=False)
+    op.create_table('welfare_reports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('remarks', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_welfare_reports_student_id'), 'welfare_reports', ['student_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_welfare_reports_student_id'), table_name='welfare_reports')
+    op.drop_table('welfare_reports')
+    op.drop_index('idx_student_subject_subject_id', table_name='student_subjects')
+    op.drop_index('idx_student_subject_student_id', table_name='student_subjects')
+    op.drop_table('student_subjects')
+    op.drop_index(op.f('ix_results_teacher_id'), table_name='results')
+    op.drop_index(op.f('ix_results_subject_id'), table_name='results')
+    op.drop_index(op.f('ix_results_student_id'), table_name='results')
+    op.drop_index(op.f('ix_results_exam_id'), table_name='results')
+    op.drop_table('results')
+    op.drop_index('idx_teacher_subject_teacher_id', table_name='teacher_subjects')
+    op.drop_index('idx_teacher_subject_subject_id', table_name='teacher_subjects')
+    op.drop_table('teacher_subjects')
+    op.drop_index(op.f('ix_students_school_class_id'), table_name='students')
+    op.drop_index(op.f('ix_students_parent_id'), table_name='students')
+    op.drop_index(op.f('ix_students_admission_number'), table_name='students')
+    op.drop_table('students')
+    op.drop_index(op.f('ix_teachers_user_id'), table_name='teachers')
+    op.drop_table('teachers')
+    op.drop_index(op.f('ix_school_classes_name'), table_name='school_classes')
+    op.drop_index(op.f('ix_school_classes_form_id'), table_name='school_classes')
+    op.drop_index(op.f('ix_school_classes_class_teacher_id'), table_name='school_classes')
+    op.drop_table('school_classes')
+    op.drop_index(op.f('ix_exams_form_id'), table_name='exams')
+    op.drop_table('exams')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_role'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_subjects_name'), table_name='subjects')
+    op.drop_table('subjects')
+    op.drop_index(op.f('ix_forms_name'), table_name='forms')
+    op.drop_table('forms')
@@ -0,0 +1,36 @@
+"""add table_versions
+
+Revision ID: 4a7c3e91b2f5
+Revises: e2d9f4a6c811
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a7c3e91b2f5'
+down_revision = 'e2d9f4a6c811'
+branch_labels = None
+depends_on = None
+
+TRACKED_TABLES = ('forms', 'subjects', 'exams', 'school_classes', 'results', 'students', 'teachers', 'users')
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table('table_versions'):
+        op.create_table('table_versions',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('name')
+        )
+    table_versions = sa.table('table_versions', sa.column('name', sa.String), sa.column('version', sa.Integer))
+    existing = {row[0] for row in op.get_bind().execute(sa.select(table_versions.c.name))}
+    missing = [{'name': name, 'version': 0} for name in TRACKED_TABLES if name not in existing]
+    if missing:
+        op.bulk_insert(table_versions, missing)
+
+
+def downgrade():
+    op.drop_table('table_versions')
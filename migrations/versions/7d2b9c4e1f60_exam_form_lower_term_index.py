@@ -0,0 +1,30 @@
+"""index exams on (form_id, lower(term))
+
+Revision ID: 7d2b9c4e1f60
+Revises: 4a7c3e91b2f5
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2b9c4e1f60'
+down_revision = '4a7c3e91b2f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Every exam lookup compares lower(term), which the plain (form_id, term) index cannot serve
+    indexes = [index['name'] for index in sa.inspect(op.get_bind()).get_indexes('exams')]
+    if 'idx_exam_form_term' in indexes:
+        op.drop_index('idx_exam_form_term', table_name='exams')
+    if 'idx_exam_form_lower_term' not in indexes:
+        op.create_index('idx_exam_form_lower_term', 'exams', ['form_id', sa.text('lower(term)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_exam_form_lower_term', table_name='exams')
+    op.create_index('idx_exam_form_term', 'exams', ['form_id', 'term'], unique=False)
@@ -0,0 +1,29 @@
+"""add users.token_version
+
+Revision ID: 8b4e6d2f1a37
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e6d2f1a37'
+down_revision = '3f1c2a9b7d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = [c['name'] for c in sa.inspect(op.get_bind()).get_columns('users')]
+    if 'token_version' in columns:
+        return
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
@@ -0,0 +1,61 @@
+"""one live result per (student, exam, subject)
+
+Revision ID: b3e8d1f4a7c2
+Revises: 9c4f7a2d5e18
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8d1f4a7c2'
+down_revision = '9c4f7a2d5e18'
+branch_labels = None
+depends_on = None
+
+STAT_COLUMNS = ('exam_id', 'subject_id', 'school_class_id', 'result_count', 'score_total', 'min_score', 'max_score', 'updated_at')
+
+
+def upgrade():
+    if 'uq_results_student_exam_subject' in [index['name'] for index in sa.inspect(op.get_bind()).get_indexes('results')]:
+        return
+    results = sa.table('results', sa.column('id', sa.Integer), sa.column('student_id', sa.Integer),
+                       sa.column('exam_id', sa.Integer), sa.column('subject_id', sa.Integer),
+                       sa.column('score', sa.Float), sa.column('deleted_at', sa.DateTime))
+
+    # Concurrent mark sheets could each insert the same result; keep the newest live row of each
+    newest = (
+        sa.select(sa.func.max(results.c.id))
+        .where(results.c.deleted_at.is_(None))
+        .group_by(results.c.student_id, results.c.exam_id, results.c.subject_id)
+    )
+    duplicates = op.get_bind().execute(
+        results.update()
+        .where(results.c.deleted_at.is_(None), results.c.id.notin_(newest))
+        .values(deleted_at=sa.func.current_timestamp())
+    ).rowcount
+    if duplicates:
+        # The duplicates were counted in exam_stats; resynchronize it as app/stats.py:rebuild_exam_stats does
+        students = sa.table('students', sa.column('id', sa.Integer), sa.column('school_class_id', sa.Integer),
+                            sa.column('deleted_at', sa.DateTime))
+        exam_stats = sa.table('exam_stats', *(sa.column(name) for name in STAT_COLUMNS))
+        op.execute(exam_stats.delete())
+        op.execute(exam_stats.insert().from_select(list(STAT_COLUMNS), (
+            sa.select(
+                results.c.exam_id, results.c.subject_id, students.c.school_class_id,
+                sa.func.count(results.c.id), sa.func.sum(results.c.score), sa.func.min(results.c.score),
+                sa.func.max(results.c.score), sa.func.current_timestamp(),
+            )
+            .select_from(results.join(students, students.c.id == results.c.student_id))
+            .where(results.c.deleted_at.is_(None), students.c.deleted_at.is_(None), students.c.school_class_id.isnot(None))
+            .group_by(results.c.exam_id, results.c.subject_id, students.c.school_class_id)
+        )))
+
+    op.create_index('uq_results_student_exam_subject', 'results', ['student_id', 'exam_id', 'subject_id'], unique=True,
+                    sqlite_where=sa.text('deleted_at IS NULL'), postgresql_where=sa.text('deleted_at IS NULL'))
+
+
+def downgrade():
+    op.drop_index('uq_results_student_exam_subject', table_name='results')
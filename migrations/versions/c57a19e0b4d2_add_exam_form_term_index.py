@@ -0,0 +1,26 @@
+"""add exams(form_id, term) index
+
+Revision ID: c57a19e0b4d2
+Revises: 8b4e6d2f1a37
+Create Date: 2026-10-17 10:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c57a19e0b4d2'
+down_revision = '8b4e6d2f1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = [index['name'] for index in sa.inspect(op.get_bind()).get_indexes('exams')]
+    if 'idx_exam_form_term' not in indexes:
+        op.create_index('idx_exam_form_term', 'exams', ['form_id', 'term'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_exam_form_term', table_name='exams')
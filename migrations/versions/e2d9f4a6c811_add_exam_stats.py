@@ -0,0 +1,65 @@
+"""add exam_stats
+
+Revision ID: e2d9f4a6c811
+Revises: c57a19e0b4d2
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2d9f4a6c811'
+down_revision = 'c57a19e0b4d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('exam_stats'):
+        return
+    op.create_table('exam_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('exam_id', sa.Integer(), nullable=False),
+    sa.Column('subject_id', sa.Integer(), nullable=False),
+    sa.Column('school_class_id', sa.Integer(), nullable=False),
+    sa.Column('result_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('score_total', sa.Float(), server_default='0.0', nullable=False),
+    sa.Column('min_score', sa.Float(), nullable=True),
+    sa.Column('max_score', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.ForeignKeyConstraint(['school_class_id'], ['school_classes.id'], ),
+    sa.ForeignKeyConstraint(['subject_id'], ['subjects.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('exam_id', 'subject_id', 'school_class_id', name='uq_exam_stats_exam_subject_class')
+    )
+    op.create_index(op.f('ix_exam_stats_exam_id'), 'exam_stats', ['exam_id'], unique=False)
+
+    # Backfill from existing results (the aggregate in app/stats.py:_aggregate), so the first write
+    # to a group adds to the real totals instead of starting from zero
+    results = sa.table('results', sa.column('id', sa.Integer), sa.column('student_id', sa.Integer),
+                       sa.column('exam_id', sa.Integer), sa.column('subject_id', sa.Integer),
+                       sa.column('score', sa.Float), sa.column('deleted_at', sa.DateTime))
+    students = sa.table('students', sa.column('id', sa.Integer), sa.column('school_class_id', sa.Integer),
+                        sa.column('deleted_at', sa.DateTime))
+    exam_stats = sa.table('exam_stats', *(sa.column(name) for name in (
+        'exam_id', 'subject_id', 'school_class_id', 'result_count', 'score_total', 'min_score', 'max_score', 'updated_at'
+    )))
+    aggregate = (
+        sa.select(
+            results.c.exam_id, results.c.subject_id, students.c.school_class_id,
+            sa.func.count(results.c.id), sa.func.sum(results.c.score), sa.func.min(results.c.score),
+            sa.func.max(results.c.score), sa.func.current_timestamp(),
+        )
+        .select_from(results.join(students, students.c.id == results.c.student_id))
+        .where(results.c.deleted_at.is_(None), students.c.deleted_at.is_(None), students.c.school_class_id.isnot(None))
+        .group_by(results.c.exam_id, results.c.subject_id, students.c.school_class_id)
+    )
+    op.execute(exam_stats.insert().from_select([column.name for column in exam_stats.columns], aggregate))
+
+
+def downgrade():
+    op.drop_index(op.f('ix_exam_stats_exam_id'), table_name='exam_stats')
+    op.drop_table('exam_stats')
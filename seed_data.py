@@ -1,5 +1,8 @@
 from app import db, create_app
-from app.models import User, Teacher, Form, SchoolClass, Student, Subject, Exam, Result, WelfareReport, TeacherSubject
+from flask_migrate import upgrade
+from app.models import User, Teacher, Form, SchoolClass, Student, Subject, Exam, Result, WelfareReport, TeacherSubject, ExamStat
+from app.stats import rebuild_exam_stats
+import os
 import random
 from datetime import datetime
 
@@ -11,6 +14,7 @@ def clear_existing_data():
     with app.app_context():
         # Clear data in reverse dependency order to avoid foreign key violations
         db.session.query(WelfareReport).delete()
+        db.session.query(ExamStat).delete()
         db.session.query(Result).delete()
         db.session.query(TeacherSubject).delete()
         # Clear student_subject relationships
@@ -246,7 +250,17 @@ def seed_welfare_reports():
         db.session.commit()
     print("Welfare reports seeded.")
 
+def seed_exam_stats():
+    # Results are inserted directly above, so the running aggregates are built from them in one pass
+    print("Building exam statistics...")
+    with app.app_context():
+        rebuild_exam_stats()
+    print("Exam statistics built.")
+
 def seed_data():
+    # The app no longer creates tables; bring the database up to the latest migration first
+    with app.app_context():
+        upgrade(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'))
     clear_existing_data()
     seed_forms()
     seed_users()
@@ -258,6 +272,7 @@ def seed_data():
     seed_exams()
     seed_teacher_subjects()  # Moved before seed_results
     seed_results()
+    seed_exam_stats()
     seed_welfare_reports()
 
 if __name__ == "__main__":
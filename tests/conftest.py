@@ -0,0 +1,63 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.config import Config, engine_options
+from app.models import Exam, Form, Result, SchoolClass, Student, Subject, Teacher, User
+from flask_jwt_extended import create_access_token
+
+# Every request loads its principal and table versions and nothing is served from a cache
+UNCACHED = dict(PRINCIPAL_CACHE_TTL=0, REFERENCE_VERSION_TTL=0, RESPONSE_CACHE='none',
+                REQUEST_TIMING=True, JWT_EMBED_CLAIMS=False, SLOW_REQUEST_MS=0)
+
+def seed(parent_children=(1, 3), classes=2):
+    """A small school: an admin, a class teacher, parents with the given number of children, one exam with results."""
+    form = Form(name="Form 1")
+    admin = User(username="admin", email="admin@example.com", password="x", role="admin")
+    teacher_user = User(username="teacher", email="teacher@example.com", password="x", role="teacher")
+    teacher = Teacher(user=teacher_user)
+    school_classes = [SchoolClass(name=f"1{chr(65 + n)}", form=form, class_teacher=teacher_user if n == 0 else None)
+                      for n in range(classes)]
+    subjects = [Subject(name=name) for name in ("Mathematics", "English")]
+    exam = Exam(name="Opener", term="Term 1", form=form)
+    parents, students = [], []
+    for p, children in enumerate(parent_children):
+        parent = User(username=f"parent{p}", email=f"parent{p}@example.com", password="x", role="parent")
+        parents.append(parent)
+        for _ in range(children):
+            n = len(students)
+            students.append(Student(name=f"Student {n}", admission_number=f"ADM{n:04d}", parent=parent,
+                                    school_class=school_classes[n % classes], subjects=subjects))
+    db.session.add_all([admin, teacher, *school_classes, exam, *students])
+    db.session.flush()
+    db.session.add_all([Result(student=student, exam=exam, subject=subject, teacher=teacher, score=40 + n)
+                        for n, (student, subject) in enumerate((s, subject) for s in students for subject in subjects)])
+    db.session.commit()
+    return {"admin": admin.id, "teacher": teacher_user.id, "parents": [parent.id for parent in parents], "exam": exam.id}
+
+@pytest.fixture
+def make_app(monkeypatch):
+    """Build (app, seeded ids) on the given database with Config overrides; the schema is created and seeded."""
+    def build(database_uri="sqlite://", **config):
+        # The default in-memory database is one connection shared by every thread (StaticPool)
+        # Config reads the environment at import time; patch the class so every test gets its own settings
+        monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', database_uri)
+        monkeypatch.setattr(Config, 'SQLALCHEMY_ENGINE_OPTIONS', engine_options(database_uri))
+        for name, value in {**UNCACHED, **config}.items():
+            monkeypatch.setattr(Config, name, value)
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all()
+            ids = seed()
+        return app, ids
+    return build
+
+def auth_headers(app, user_id):
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
@@ -0,0 +1,29 @@
+# tests/test_loader_statements.py
+import pytest
+
+from benchmarks.loader_statements import EXPECTED, statement_count
+from conftest import auth_headers
+
+def cases(ids):
+    """(profile, small request, large request) as (user id, url)."""
+    small_parent, large_parent = ids['parents'][0], ids['parents'][-1]
+    return [
+        ('students.list', (ids['admin'], '/api/students?limit=1'), (ids['admin'], '/api/students?limit=200')),
+        ('students.by_parent', (small_parent, f'/api/parents/{small_parent}/students'),
+         (large_parent, f'/api/parents/{large_parent}/students')),
+        ('classes.list', (ids['teacher'], '/api/classes'), (ids['admin'], '/api/classes')),
+    ]
+
+@pytest.mark.parametrize('profile', sorted(EXPECTED))
+def test_statement_count_is_fixed(make_app, profile):
+    app, ids = make_app()
+    client = app.test_client()
+    _, *requests = next(case for case in cases(ids) if case[0] == profile)
+    rows = []
+    for user_id, url in requests:
+        response = client.get(url, headers=auth_headers(app, user_id))
+        assert response.status_code == 200, response.get_data(as_text=True)
+        assert statement_count(response) == EXPECTED[profile], url
+        rows.append(len(response.get_json()))
+    # The large request must return more rows, or an N+1 would go unnoticed
+    assert rows[0] < rows[1]
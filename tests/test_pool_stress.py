@@ -0,0 +1,47 @@
+# tests/test_pool_stress.py
+import threading
+
+from app import db
+from app.pool import MeteredQueuePool, pool_stats, pool_status
+from conftest import auth_headers
+
+THREADS = 8
+REQUESTS_PER_THREAD = 25
+
+def test_pool_serves_concurrent_reads_without_exhaustion(make_app, monkeypatch, tmp_path):
+    # Size the pool the way a worker with THREADS request threads would be sized (see engine_options)
+    monkeypatch.setenv('WEB_CONCURRENCY', '1')
+    monkeypatch.setenv('WEB_THREADS', str(THREADS))
+    app, ids = make_app(f"sqlite:///{tmp_path / 'pool_stress.db'}")
+    headers = auth_headers(app, ids['admin'])
+    exam_id = ids['exam']
+    urls = ['/api/results?limit=50', '/api/subjects', '/api/exams', '/api/students?limit=50',
+            f'/api/exams/{exam_id}/stats', f'/api/exams/{exam_id}/rankings', '/api/classes', '/api/users?limit=20']
+    with app.app_context():
+        assert isinstance(db.engine.pool, MeteredQueuePool)
+    pool_stats.reset()
+
+    failures = []
+    start_line = threading.Barrier(THREADS)
+
+    def worker(offset):
+        client = app.test_client()
+        start_line.wait()
+        for i in range(offset, offset + REQUESTS_PER_THREAD):
+            url = urls[i % len(urls)]
+            status = client.get(url, headers=headers).status_code
+            if status != 200:
+                failures.append((url, status))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        status = pool_status(db.engine)
+    assert failures == []
+    assert status['timeouts'] == 0
+    assert status['checkouts'] >= THREADS * REQUESTS_PER_THREAD
+    assert status['peak_checked_out'] <= status['size'] + status['max_overflow']